@@ -0,0 +1,40 @@
+"""Add varchar_pattern_ops index on users.email for prefix search
+
+Revision ID: 20260301_email_pattern_index
+Revises: 20260119_change_user_id_to_uuid
+Create Date: 2026-03-01
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20260301_email_pattern_index"
+down_revision: Union[str, None] = "20260119_change_user_id_to_uuid"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the users table writable while the index builds.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_email_pattern",
+            "users",
+            ["email"],
+            postgresql_ops={"email": "varchar_pattern_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_email_pattern",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
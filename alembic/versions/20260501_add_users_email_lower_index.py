@@ -0,0 +1,55 @@
+"""Add unique index on lower(users.email)
+
+Revision ID: 20260501_email_lower_index
+Revises: 20260401_refresh_tokens
+Create Date: 2026-05-01
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20260501_email_lower_index"
+down_revision: Union[str, None] = "20260401_refresh_tokens"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A failed CONCURRENTLY build leaves an INVALID index behind, so refuse
+    # up front if existing emails already collide ignoring case.
+    if not op.get_context().as_sql:
+        duplicates = op.get_bind().execute(
+            sa.text(
+                "SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1 LIMIT 10"
+            )
+        ).scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                "users.email has case-insensitive duplicates, merge them before upgrading: "
+                + ", ".join(duplicates)
+            )
+
+    # CONCURRENTLY keeps the users table writable while the index builds.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [sa.text("lower(email)")],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_email_lower",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
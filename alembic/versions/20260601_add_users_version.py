@@ -0,0 +1,30 @@
+"""Add users.version row version for optimistic locking and ETags
+
+Revision ID: 20260601_users_version
+Revises: 20260501_email_lower_index
+Create Date: 2026-06-01
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20260601_users_version"
+down_revision: Union[str, None] = "20260501_email_lower_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A constant default is stored in the catalog: no table rewrite.
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "version")
@@ -0,0 +1,31 @@
+"""Add users.local_credentials to gate local password login
+
+Revision ID: 20260701_local_credentials
+Revises: 20260601_users_version
+Create Date: 2026-07-01
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20260701_local_credentials"
+down_revision: Union[str, None] = "20260601_users_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows were written by the Supabase routes: their hashes are not
+    # login credentials. A constant default is stored in the catalog: no rewrite.
+    op.add_column(
+        "users",
+        sa.Column("local_credentials", sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "local_credentials")
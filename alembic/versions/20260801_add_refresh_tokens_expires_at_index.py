@@ -0,0 +1,39 @@
+"""Add index on refresh_tokens.expires_at for purging expired tokens
+
+Revision ID: 20260801_refresh_tokens_expires_at
+Revises: 20260701_local_credentials
+Create Date: 2026-08-01
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20260801_refresh_tokens_expires_at"
+down_revision: Union[str, None] = "20260701_local_credentials"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps logins and refreshes writing while the index builds.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_refresh_tokens_expires_at",
+            "refresh_tokens",
+            ["expires_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_refresh_tokens_expires_at",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,198 @@
+"""
+Command-line entry point: `python -m app <command>`.
+
+    python -m app export-users --format csv --output users.csv
+    python -m app import-users users.ndjson --on-conflict skip
+    python -m app calibrate-password-hashing --scheme argon2 --target-ms 250
+    python -m app purge-refresh-tokens
+    python -m app serve --workers 4
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+from app.core.config import settings
+from app.core.security import PASSWORD_HASH_SCHEMES, calibrate_password_hashing
+from app.db.session import AsyncSessionLocal, get_async_engine
+from app.server import serve
+from app.services.local_auth import purge_expired_refresh_tokens
+from app.services.user_bulk import export_users, import_users
+from app.services.user_cache import user_cache
+
+
+# ===== export-users =====
+async def _export(args: argparse.Namespace) -> None:
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    stats: dict[str, int] = {}
+    started = time.perf_counter()
+    try:
+        async for chunk in export_users(
+            fmt=args.format,
+            include_password_hashes=args.include_password_hashes,
+            batch_size=args.batch_size,
+            stats=stats,
+        ):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+        await get_async_engine().dispose()
+    elapsed = time.perf_counter() - started
+    rows = stats.get("rows", 0)
+    print(
+        f"exported {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)",
+        file=sys.stderr,
+    )
+
+
+# ===== import-users =====
+def _read_rows(path: str, fmt: str) -> Iterator[dict[str, Any]]:
+    handle = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+async def _import(args: argparse.Namespace) -> None:
+    fmt = args.format or ("csv" if Path(args.input).suffix == ".csv" else "ndjson")
+    await user_cache.start()  # so updated rows are invalidated in running workers
+    try:
+        report = await import_users(
+            _read_rows(args.input, fmt),
+            on_conflict=args.on_conflict,
+            batch_size=args.batch_size,
+            local_credentials=args.local_credentials,
+        )
+    finally:
+        await user_cache.stop()
+        await get_async_engine().dispose()
+    print(
+        f"imported {report.rows} rows in {report.seconds:.2f}s "
+        f"({report.rows_per_second:.0f} rows/s): {report.inserted} inserted, "
+        f"{report.updated} updated, {report.skipped} skipped, {report.conflicts} id conflicts, "
+        f"{report.hashed} hashed",
+        file=sys.stderr,
+    )
+
+
+# ===== calibrate-password-hashing =====
+_COST_SETTINGS = {
+    "bcrypt_rounds": "PASSWORD_BCRYPT_ROUNDS",
+    "argon2_time_cost": "PASSWORD_ARGON2_TIME_COST",
+    "argon2_memory_cost": "PASSWORD_ARGON2_MEMORY_COST",
+    "argon2_parallelism": "PASSWORD_ARGON2_PARALLELISM",
+}
+
+
+async def _calibrate(args: argparse.Namespace) -> None:
+    costs = {}
+    if args.scheme == "argon2":
+        costs = {"argon2_memory_cost": args.memory_cost, "argon2_parallelism": args.parallelism}
+    costs, seconds = calibrate_password_hashing(
+        args.scheme, args.target_ms / 1000, samples=args.samples, **costs
+    )
+    print(
+        f"{args.scheme}: {seconds * 1000:.0f} ms per hash, about "
+        f"{1 / seconds:.1f} hashes/s per hashing worker (target {args.target_ms:.0f} ms)",
+        file=sys.stderr,
+    )
+    print(f"PASSWORD_HASH_SCHEME={args.scheme}")
+    for key, value in costs.items():
+        print(f"{_COST_SETTINGS[key]}={value}")
+
+
+# ===== purge-refresh-tokens =====
+async def _purge_refresh_tokens(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as session:
+            purged = await purge_expired_refresh_tokens(session=session, batch_size=args.batch_size)
+    finally:
+        await get_async_engine().dispose()
+    print(f"purged {purged} expired refresh tokens in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+# ===== serve =====
+def _serve(args: argparse.Namespace) -> None:
+    sys.exit(serve(host=args.host, port=args.port, workers=args.workers))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export-users", help="stream the users table as NDJSON or CSV")
+    export.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    export.add_argument("--output", "-o", help="file to write (default: stdout)")
+    export.add_argument("--batch-size", type=int, default=5000)
+    export.add_argument(
+        "--include-password-hashes",
+        action="store_true",
+        help="add hashed_password, e.g. to migrate users to another database",
+    )
+    export.set_defaults(handler=_export)
+
+    imp = commands.add_parser("import-users", help="bulk-load users with COPY")
+    imp.add_argument("input", help="NDJSON or CSV file ('-' for stdin)")
+    imp.add_argument("--format", choices=["ndjson", "csv"], help="default: from the file extension")
+    imp.add_argument(
+        "--on-conflict",
+        choices=["skip", "update"],
+        default="skip",
+        help="skip existing users, or update them by email",
+    )
+    imp.add_argument("--batch-size", type=int, default=5000)
+    imp.add_argument(
+        "--local-credentials",
+        action="store_true",
+        help="let rows without a local_credentials field log in with AUTH_BACKEND=local",
+    )
+    imp.set_defaults(handler=_import)
+
+    calibrate = commands.add_parser(
+        "calibrate-password-hashing",
+        help="pick password hashing costs for a target hash time on this machine",
+    )
+    calibrate.add_argument("--scheme", choices=PASSWORD_HASH_SCHEMES, default=settings.PASSWORD_HASH_SCHEME)
+    calibrate.add_argument("--target-ms", type=float, default=250.0)
+    calibrate.add_argument("--samples", type=int, default=3, help="hashes timed per cost (median)")
+    calibrate.add_argument(
+        "--memory-cost", type=int, default=settings.PASSWORD_ARGON2_MEMORY_COST, help="argon2, KiB"
+    )
+    calibrate.add_argument("--parallelism", type=int, default=settings.PASSWORD_ARGON2_PARALLELISM, help="argon2")
+    calibrate.set_defaults(handler=_calibrate)
+
+    purge = commands.add_parser(
+        "purge-refresh-tokens", help="delete expired local auth refresh tokens (e.g. from cron)"
+    )
+    purge.add_argument("--batch-size", type=int, default=10_000, help="rows deleted per transaction")
+    purge.set_defaults(handler=_purge_refresh_tokens)
+
+    server = commands.add_parser("serve", help="run the API with pre-forked uvicorn workers")
+    server.add_argument("--host", help=f"default: SERVER_HOST ({settings.SERVER_HOST})")
+    server.add_argument("--port", type=int, help=f"default: SERVER_PORT ({settings.SERVER_PORT})")
+    server.add_argument("--workers", type=int, help="default: SERVER_WORKERS, or one per CPU")
+    server.set_defaults(handler=_serve)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    if asyncio.iscoroutinefunction(args.handler):
+        asyncio.run(args.handler(args))
+    else:
+        args.handler(args)
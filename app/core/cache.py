@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+from app.core.metrics import REGISTRY, CallbackMetric
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+# Caches created with a name are exported as metrics.
+_named_caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe in-process LRU cache with per-entry expiry.
+    Size is bounded by max_entries; the least recently used entry is evicted first.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, name: str | None = None) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if name is not None:
+            _named_caches[name] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Store value for min(ttl, cache ttl) seconds."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if not self.enabled or ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+REGISTRY.register(
+    CallbackMetric(
+        "cache_entries",
+        "Entries held by in-process caches",
+        ["cache"],
+        lambda: (((name,), len(cache)) for name, cache in _named_caches.items()),
+    )
+)
+REGISTRY.register(
+    CallbackMetric(
+        "cache_lookups_total",
+        "In-process cache lookups",
+        ["cache", "result"],
+        lambda: (
+            ((name, result), getattr(cache, attr))
+            for name, cache in _named_caches.items()
+            for result, attr in (("hit", "hits"), ("miss", "misses"))
+        ),
+        type="counter",
+    )
+)
+REGISTRY.register(
+    CallbackMetric(
+        "cache_evictions_total",
+        "Entries evicted to stay within max_entries",
+        ["cache"],
+        lambda: (((name,), cache.evictions) for name, cache in _named_caches.items()),
+        type="counter",
+    )
+)
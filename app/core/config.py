@@ -27,11 +27,96 @@ class Settings(BaseSettings):
     
     # CORS
     BACKEND_CORS_ORIGINS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+
+    # Logging: records are queued and written by a background thread (see
+    # app/core/logging.py). LOG_SAMPLE_RATES keeps that fraction of records per
+    # logger (and its children) and message template, never sampling ERROR and
+    # above; the default thins out rejected-token warnings, {} disables sampling.
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_SAMPLE_RATES: dict[str, float] = {"app.core.dependencies.auth_failures": 0.1}
+
+    # `python -m app serve`: worker processes (0 = one per CPU this process may
+    # use); on SIGTERM workers stop accepting and get SERVER_GRACEFUL_TIMEOUT_SECONDS
+    # to finish in-flight requests before connections are closed.
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: float = 30.0
+
+    # Prometheus metrics middleware and /metrics endpoint (per worker process)
+    METRICS_ENABLED: bool = True
     
     # Supabase
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
-    
+
+    # "async" serves /auth on the event loop with the async Supabase client;
+    # "sync" keeps the original threadpool routes.
+    AUTH_ROUTES_MODE: Literal["async", "sync"] = "async"
+
+    # Who issues access tokens by default: "supabase" (Supabase Auth) or "local"
+    # (this app checks users.hashed_password and signs HS256 tokens with SECRET_KEY,
+    # rotating opaque refresh tokens). LOCAL_AUTH_ENABLED serves the local token
+    # routes alongside Supabase so individual routes can opt in.
+    AUTH_BACKEND: Literal["supabase", "local"] = "supabase"
+    LOCAL_AUTH_ENABLED: bool = False
+    LOCAL_ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    LOCAL_REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Expired refresh_tokens rows are deleted this often by each worker (0 disables)
+    LOCAL_REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: float = 3600.0
+
+    # Supabase Auth token verification
+    # "local" verifies access tokens in-process (JWT secret or JWKS);
+    # "remote" calls supabase.auth.get_user on every request.
+    AUTH_TOKEN_VERIFICATION: Literal["local", "remote"] = "local"
+    SUPABASE_JWT_SECRET: str = ""
+    SUPABASE_JWKS_URL: str = ""
+    SUPABASE_JWKS_CACHE_SECONDS: int = 300
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    SUPABASE_JWT_ISSUER: str = ""
+
+    # Validated-token cache (entries expire at min(token exp, TTL); 0 disables)
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 60
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10_000
+    AUTH_NEGATIVE_CACHE_TTL_SECONDS: int = 10
+    AUTH_NEGATIVE_CACHE_MAX_ENTRIES: int = 1_000
+
+    # Shared Supabase HTTP connection pool
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = 100
+    SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_HTTP_TIMEOUT: float = 10.0
+    SUPABASE_HTTP_CONNECT_TIMEOUT: float = 5.0
+
+    # Auth endpoint rate limits (token buckets per worker process), per route and
+    # key ("ip", "email"): "<count>/<second|minute|hour|day>" allows bursts of
+    # <count>. A JSON override replaces the whole mapping; {} for a route disables it.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: dict[str, dict[str, str]] = {
+        "login": {"ip": "30/minute", "email": "10/minute"},
+        "signup": {"ip": "10/minute", "email": "3/hour"},
+        "reset_password": {"ip": "10/minute", "email": "3/hour"},
+        "resend_verification": {"ip": "10/minute", "email": "3/hour"},
+        "local_token": {"ip": "30/minute", "email": "10/minute"},
+        "local_refresh": {"ip": "60/minute"},
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    # Only behind a proxy that sets X-Forwarded-For; otherwise clients can spoof it
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+
+    # Supabase Auth resilience: per-operation timeouts (seconds; overrides as JSON,
+    # e.g. {"get_user": 2}), circuit breaker (threshold 0 disables) and jittered
+    # retries for idempotent calls
+    SUPABASE_AUTH_TIMEOUT: float = 5.0
+    SUPABASE_AUTH_TIMEOUTS: dict[str, float] = {}
+    SUPABASE_AUTH_BREAKER_FAILURE_THRESHOLD: int = 5
+    SUPABASE_AUTH_BREAKER_RESET_SECONDS: float = 10.0
+    SUPABASE_AUTH_BREAKER_HALF_OPEN_CALLS: int = 1
+    SUPABASE_AUTH_RETRIES: int = 2
+    SUPABASE_AUTH_RETRY_BACKOFF_SECONDS: float = 0.05
+
     # Database
     POSTGRES_SERVER: str = ""
     POSTGRES_PORT: int = 5432
@@ -39,7 +124,72 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
 
+    # Connection pool, per engine and per worker process: a worker can hold up to
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so budget against the plan's limit.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Primary connections all `python -m app serve` workers may hold together,
+    # split per worker across its engines (async, plus sync for AUTH_ROUTES_MODE=sync)
+    # and the user cache's LISTEN connection (0 = no budget, per-worker sizes as above)
+    DB_CONNECTION_BUDGET: int = 0
+    # Log every SQL statement (sqlalchemy.engine at INFO)
+    DB_ECHO: bool = False
+
+    # Connection pooler in front of Postgres (Supavisor / PgBouncer): "direct",
+    # "session" (port 5432) or "transaction" (port 6543). Transaction mode hands
+    # each transaction a different server connection, so prepared statements are
+    # not cached and get unique names, the local pool is DB_POOLER_POOL_SIZE
+    # (0 = NullPool) and pre-ping is skipped unless DB_POOL_PRE_PING is set.
+    DB_POOLER_MODE: Literal["direct", "session", "transaction"] = "direct"
+    DB_POOLER_POOL_SIZE: int = 5
+    # asyncpg prepared statement cache per connection (default 100, 0 in transaction mode)
+    DB_STATEMENT_CACHE_SIZE: int | None = None
+
+    # Read replicas (same credentials format as the primary, e.g.
+    # "postgresql://user:pw@replica-1:5432/postgres", comma separated or JSON).
+    # Replicas lagging more than DB_REPLICA_MAX_LAG_SECONDS, or failing the
+    # periodic health check, are skipped; with none healthy reads use the primary.
+    DATABASE_REPLICA_URIS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    DB_REPLICA_BALANCING: Literal["round_robin", "least_connections"] = "round_robin"
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+
+    # Startup: connections opened concurrently before serving, and how the
+    # schema is handled ("auto" = create_all when local, Alembic head check otherwise)
+    DB_WARMUP_CONNECTIONS: int = 10
+    DB_SCHEMA_STARTUP: Literal["auto", "create_all", "alembic_check", "skip"] = "auto"
+
     SECRET_KEY: str = ""
+
+    # Password hashing: new hashes use PASSWORD_HASH_SCHEME at these costs. Hashes
+    # from another scheme or a lower cost still verify and are replaced on the
+    # next successful login. Plain bcrypt reads only the first 72 bytes of a
+    # password; bcrypt_sha256 and argon2 (argon2id) read all of it. Pick costs
+    # with `python -m app calibrate-password-hashing`.
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "bcrypt_sha256", "argon2"] = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536  # KiB
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+
+    # Password hashing process pool (0 workers hashes in a thread instead)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_DEPTH: int = 64
+
+    # Write-behind provisioning of local user rows on login/verify (async routes)
+    USER_PROVISIONING_WRITE_BEHIND: bool = True
+    USER_PROVISIONING_BATCH_SIZE: int = 100
+    USER_PROVISIONING_FLUSH_INTERVAL_SECONDS: float = 0.5
+    # Buffered users per worker before login/verify answer 503
+    USER_PROVISIONING_MAX_PENDING: int = 10_000
+
+    # In-process user-row cache ("postgres" invalidates other workers via LISTEN/NOTIFY)
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 10_000
+    USER_CACHE_INVALIDATION: Literal["none", "postgres"] = "none"
     
     # Computed fields
     @computed_field
@@ -60,6 +210,11 @@ class Settings(BaseSettings):
             f"{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @computed_field
+    def SUPABASE_AUTH_URL(self) -> str:
+        """Supabase Auth (GoTrue) base URL"""
+        return f"{self.SUPABASE_URL.rstrip('/')}/auth/v1"
+
 
 # Instantiate settings
 settings = Settings()
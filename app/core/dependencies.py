@@ -1,90 +1,163 @@
+import hashlib
 import logging
-from typing import Annotated
+import time
+from abc import ABC, abstractmethod
+from typing import Annotated, Awaitable, Callable
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from supabase import Client
+from supabase import AsyncClient, Client
 
+from app.db.replicas import get_async_read_db, get_read_db, use_primary
 from app.db.session import get_db, get_async_db
-from app.db.supabase import get_supabase_client
+from app.db.supabase import call_supabase_auth, get_async_supabase_client, get_supabase_client
 from app.models.users import User  # Your User model
+from app.services.provisioning import user_provisioner
+from app.services.user_cache import user_cache
+from .cache import TTLCache
 from .config import settings
+from .resilience import ServiceUnavailable
+from .security import decode_access_token, decode_supabase_token, peek_token_expiry
 
 logger = logging.getLogger(__name__)
+# Rejected tokens get their own logger so LOG_SAMPLE_RATES can thin them out alone.
+auth_failure_logger = logging.getLogger(f"{__name__}.auth_failures")
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/local/token"
+    if settings.AUTH_BACKEND == "local"
+    else f"{settings.API_V1_STR}/auth/login"
+)
 
 
 # ===== Type Aliases =====
 DBSession = Annotated[Session, Depends(get_db)]
 AsyncDBSession = Annotated[AsyncSession, Depends(get_async_db)]
+# Read from a replica when DATABASE_REPLICA_URIS is set; the first write moves
+# the session to the primary for the rest of the request.
+ReadDBSession = Annotated[Session, Depends(get_read_db)]
+AsyncReadDBSession = Annotated[AsyncSession, Depends(get_async_read_db)]
 SupabaseClient = Annotated[Client, Depends(get_supabase_client)]
+AsyncSupabaseClient = Annotated[AsyncClient, Depends(get_async_supabase_client)]
 AccessToken = Annotated[str, Depends(oauth2_scheme)]
 
 
+# ===== Token Caches =====
+# Keyed by sha256(token) so raw bearer tokens are never held in memory.
+token_cache: TTLCache[bytes, str] = TTLCache(
+    max_entries=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+    name="auth_token",
+)
+rejected_token_cache: TTLCache[bytes, bool] = TTLCache(
+    max_entries=settings.AUTH_NEGATIVE_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_NEGATIVE_CACHE_TTL_SECONDS,
+    name="auth_token_rejected",
+)
+
+
 # ===== Auth Dependencies =====
-async def get_current_user(
-    token: AccessToken,
-    db: DBSession,
-    supabase: SupabaseClient,
-) -> User:
+async def verify_token(token: str, supabase: AsyncClient, *, strict: bool = False) -> str:
     """
-    Validate token with Supabase and get user from database.
-    Works with both sync and async routes.
+    Validate a Supabase access token and return the user id.
+    Tokens are verified locally unless strict (or AUTH_TOKEN_VERIFICATION="remote"),
+    in which case Supabase Auth is asked so revoked sessions are rejected.
+    Strict checks bypass the validated-token cache.
     """
+    token_key = hashlib.sha256(token.encode()).digest()
+    if not strict:
+        user_id = token_cache.get(token_key)
+        if user_id is not None:
+            return user_id
+    if rejected_token_cache.get(token_key):
+        raise _invalid_credentials()
+
     try:
-        # Validate token with Supabase Auth
-        auth_response = supabase.auth.get_user(token)
-        user_id = auth_response.user.id
+        if strict or settings.AUTH_TOKEN_VERIFICATION == "remote":
+            auth_response = await call_supabase_auth("get_user", supabase.auth.get_user, token)
+            user_id = auth_response.user.id
+            expires_at = peek_token_expiry(token)
+        else:
+            claims = decode_supabase_token(token)
+            user_id = claims["sub"]
+            expires_at = float(claims["exp"])
+    except ServiceUnavailable:
+        # An outage says nothing about the token: don't cache it as rejected.
+        raise
     except Exception as e:
-        logger.error(f"Token validation failed: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
-    
-    if not user:
-        logger.error(f"User {user_id} not found in database")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return user
+        auth_failure_logger.warning("Token validation failed: %s", e)
+        rejected_token_cache.set(token_key, True)
+        raise _invalid_credentials()
+
+    if expires_at is not None:
+        token_cache.set(token_key, str(user_id), ttl=expires_at - time.time())
+    return str(user_id)
 
 
-async def get_current_user_async(
-    token: AccessToken,
-    db: AsyncDBSession,
-    supabase: SupabaseClient,
-) -> User:
+def _invalid_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+# ===== Auth Backends =====
+class AuthBackend(ABC):
+    """Turns a bearer token into a user id, raising 401 for bad tokens."""
+
+    @abstractmethod
+    async def authenticate(self, token: str, *, strict: bool = False) -> str: ...
+
+
+class SupabaseAuthBackend(AuthBackend):
+    """Tokens issued by Supabase Auth (see verify_token)."""
+
+    async def authenticate(self, token: str, *, strict: bool = False) -> str:
+        return await verify_token(token, await get_async_supabase_client(), strict=strict)
+
+
+class LocalAuthBackend(AuthBackend):
     """
-    Async version of get_current_user.
-    Use this for fully async routes.
+    HS256 tokens from /auth/local, checked in-process against SECRET_KEY.
+    There is no revocation list: strict checks are the same as normal ones, and
+    LOCAL_ACCESS_TOKEN_EXPIRE_MINUTES bounds how long a token outlives a logout.
     """
-    try:
-        auth_response = supabase.auth.get_user(token)
-        user_id = auth_response.user.id
-    except Exception as e:
-        logger.error(f"Token validation failed: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    # Async database query
-    from sqlalchemy import select
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+
+    async def authenticate(self, token: str, *, strict: bool = False) -> str:
+        try:
+            return decode_access_token(token)
+        except ValueError as e:
+            auth_failure_logger.debug("Local token validation failed: %s", e)
+            raise _invalid_credentials()
+
+
+AUTH_BACKENDS: dict[str, AuthBackend] = {
+    "supabase": SupabaseAuthBackend(),
+    "local": LocalAuthBackend(),
+}
+
+
+async def get_user_or_404(db: AsyncSession, user_id: str) -> User:
+    """The user from the cache, the database or the write-behind buffer; 404 otherwise."""
+    user = user_cache.get(user_id)
+    if user:
+        return user
+
+    statement = select(User).where(User.id == user_id)
+    user = (await db.execute(statement)).scalar_one_or_none()
+    if user is None and use_primary(db):
+        # Signed up moments ago and not replayed on the replica yet.
+        user = (await db.execute(statement)).scalar_one_or_none()
+    if user:
+        user_cache.put(user)
+    else:
+        user = user_provisioner.get_pending(user_id)
     
     if not user:
-        logger.error(f"User {user_id} not found in database")
+        logger.error("User %s not found in database", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
@@ -93,5 +166,65 @@ async def get_current_user_async(
     return user
 
 
+def current_user_dependency(
+    backend: str | None = None, *, strict: bool = False
+) -> Callable[..., Awaitable[User]]:
+    """
+    Build a get_current_user-style dependency for one auth backend (default
+    AUTH_BACKEND), e.g. `Annotated[User, Depends(current_user_dependency("local"))]`
+    on routes meant for machine clients of a Supabase deployment.
+    """
+    auth_backend = AUTH_BACKENDS[backend or settings.AUTH_BACKEND]
+
+    async def dependency(token: AccessToken, db: AsyncReadDBSession) -> User:
+        user_id = await auth_backend.authenticate(token, strict=strict)
+        return await get_user_or_404(db, user_id)
+
+    return dependency
+
+
+async def get_current_user(token: AccessToken, db: AsyncReadDBSession) -> User:
+    """
+    Validate the token with the configured AUTH_BACKEND and get the user from the database.
+    Works with both sync and async routes; the lookup runs on AsyncSession
+    so it never blocks the event loop.
+    """
+    user_id = await AUTH_BACKENDS[settings.AUTH_BACKEND].authenticate(token)
+    return await get_user_or_404(db, user_id)
+
+
+async def get_current_user_id(token: AccessToken) -> str:
+    """Just the token's user id, for routes that may answer without loading the user."""
+    return await AUTH_BACKENDS[settings.AUTH_BACKEND].authenticate(token)
+
+
+# Both variants are fully async now; the name is kept for existing routes.
+get_current_user_async = get_current_user
+
+
+async def get_current_user_strict(token: AccessToken, db: AsyncReadDBSession) -> User:
+    """
+    Always confirm the token with Supabase Auth (local tokens: see LocalAuthBackend).
+    Use this for revocation-sensitive routes (password/email changes, admin actions).
+    """
+    user_id = await AUTH_BACKENDS[settings.AUTH_BACKEND].authenticate(token, strict=True)
+    return await get_user_or_404(db, user_id)
+
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
 CurrentUserAsync = Annotated[User, Depends(get_current_user_async)]
+CurrentUserStrict = Annotated[User, Depends(get_current_user_strict)]
+CurrentUserId = Annotated[str, Depends(get_current_user_id)]
+
+
+async def get_current_superuser(current_user: CurrentUser) -> User:
+    """Restrict a route to superusers."""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges",
+        )
+    return current_user
+
+
+CurrentSuperuser = Annotated[User, Depends(get_current_superuser)]
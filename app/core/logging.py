@@ -0,0 +1,179 @@
+"""
+Logging off the event loop.
+
+configure_logging() (called first in the app lifespan) puts a single
+QueueHandler on the root logger. Callers only append the raw record to a
+bounded queue; a QueueListener thread formats it, as JSON by default, and
+writes it out. Records are never formatted on the caller's thread, so log
+with %-style arguments, not f-strings, and the work is skipped entirely for
+records that are filtered out.
+
+LOG_SAMPLE_RATES thins out repetitive loggers (rejected tokens by default):
+with a rate of 0.1 one record in ten is kept per logger and message template,
+and kept records carry `sample_rate` so counts can be scaled back up. ERROR
+and above are always kept. Sampled
+records and records dropped on a full queue are counted in
+log_records_dropped_total.
+
+SQL logging is opt-in with DB_ECHO, which sets the sqlalchemy.engine logger
+level so statements go through the same queue instead of a stdout handler.
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+log_records_dropped_total = REGISTRY.counter(
+    "log_records_dropped_total", "Log records not written", ["reason"]
+)
+
+# Loggers that otherwise keep their own synchronous handlers.
+_ROUTED_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_MAX_SAMPLED_TEMPLATES = 10_000
+
+# Attributes every LogRecord has (plus uvicorn's ANSI duplicate of the message);
+# anything else was passed with extra={...}.
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName", "color_message"}
+
+
+# ===== Formatting =====
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, extras, exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+def _formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JSONFormatter()
+    return logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+# ===== Caller side =====
+class SamplingFilter(logging.Filter):
+    """Keep one record in 1/rate per (logger, message template) below ERROR for the configured loggers."""
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        # Longest prefix first, so "app.core.dependencies" beats "app".
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self._seen: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _rate(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0:
+            return True
+        every = max(1, round(1 / rate)) if rate > 0 else 0
+        key = (record.name, str(record.msg))
+        with self._lock:
+            if len(self._seen) >= _MAX_SAMPLED_TEMPLATES:
+                self._seen.clear()  # f-string messages make every record its own template
+            seen = self._seen.get(key, 0)
+            self._seen[key] = seen + 1
+        if every and seen % every == 0:
+            record.sample_rate = rate
+            return True
+        log_records_dropped_total.labels("sampled").inc()
+        return False
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record untouched: formatting happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process, so the record needn't be pickled; the listener formats it.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped_total.labels("queue_full").inc()
+
+
+# ===== Lifecycle =====
+_listener: logging.handlers.QueueListener | None = None
+
+
+def configure_logging() -> None:
+    """Route the root, uvicorn and sqlalchemy.engine loggers through the background queue."""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(_formatter())
+
+    handler = _NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    if settings.LOG_SAMPLE_RATES:
+        handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL)
+    for name in _ROUTED_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.handlers = []
+        logger.propagate = True
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if settings.DB_ECHO else logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def _after_fork_in_child() -> None:
+    # The listener thread doesn't survive fork(): write directly until the
+    # forked worker's own lifespan configures a queue again.
+    global _listener
+    if _listener is not None:
+        logging.getLogger().handlers = list(_listener.handlers)
+        _listener = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def stop_logging() -> None:
+    """Flush the queue and write directly again, so late shutdown messages still appear."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().handlers = list(_listener.handlers)
+    _listener = None
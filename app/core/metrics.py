@@ -0,0 +1,252 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Everything is thread-safe so it can be updated from the event loop,
+threadpool routes and SQLAlchemy events alike. Values are per worker
+process; Prometheus aggregates across workers.
+"""
+
+import bisect
+import math
+import threading
+from typing import Callable, Generic, Iterable, Sequence, TypeVar
+
+# Seconds; tuned for connection checkouts and request handling.
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus `le` (less-or-equal) semantics."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """(upper bound, observations <= bound) pairs, ending with +Inf."""
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        result = []
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        buckets = self.cumulative()
+        total = buckets[-1][1]
+        if total == 0:
+            return 0.0
+        rank = q * total
+        lower_bound, lower_count = 0.0, 0
+        for bound, count in buckets:
+            if count >= rank:
+                if bound == float("inf"):
+                    return self.max
+                in_bucket = count - lower_count
+                fraction = (rank - lower_count) / in_bucket if in_bucket else 1.0
+                return min(lower_bound + (bound - lower_bound) * fraction, self.max)
+            lower_bound, lower_count = bound, count
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {
+                ("+Inf" if bound == float("inf") else str(bound)): count
+                for bound, count in self.cumulative()
+            },
+        }
+
+
+# ===== Metric families =====
+class _Value:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+C = TypeVar("C")
+Sample = tuple[str, dict[str, str], float]
+
+
+class _Family(Generic[C]):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], C] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> C:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> C:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _labels(self, values: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> Iterable[Sample]:
+        for values, child in list(self._children.items()):
+            yield self.name, self._labels(values), child.value
+
+
+class Counter(_Family[_Value]):
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class Gauge(_Family[_Value]):
+    type = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class HistogramFamily(_Family[Histogram]):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def _new_child(self) -> Histogram:
+        return Histogram(self.buckets)
+
+    def samples(self) -> Iterable[Sample]:
+        for values, histogram in list(self._children.items()):
+            labels = self._labels(values)
+            for bound, count in histogram.cumulative():
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                yield f"{self.name}_bucket", {**labels, "le": le}, count
+            yield f"{self.name}_sum", labels, histogram.sum
+            yield f"{self.name}_count", labels, histogram.count
+
+
+class CallbackMetric(_Family[None]):
+    """Values read at scrape time from `collect()` as (label values, value) pairs."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[tuple[tuple[str, ...], float]]],
+        type: str = "gauge",
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self._collect = collect
+
+    def samples(self) -> Iterable[Sample]:
+        for values, value in self._collect():
+            yield self.name, self._labels(values), value
+
+
+# ===== Registry =====
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._families: dict[str, _Family] = {}
+
+    def register(self, family: _Family) -> _Family:
+        if family.name in self._families:
+            raise ValueError(f"Metric {family.name} is already registered")
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> HistogramFamily:
+        return self.register(HistogramFamily(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+            for name, labels, value in family.samples():
+                if labels:
+                    rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                    lines.append(f"{name}{{{rendered}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,84 @@
+import time
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import REGISTRY
+
+http_requests_in_flight = REGISTRY.gauge(
+    "http_requests_in_flight", "Requests currently being handled", ["method", "route"]
+)
+http_request_duration_seconds = REGISTRY.histogram(
+    "http_request_duration_seconds", "Request latency until the response completes", ["method", "route"]
+)
+http_requests_total = REGISTRY.counter(
+    "http_requests_total", "Completed requests", ["method", "route", "status"]
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+OTHER_METHOD = "OTHER"
+_KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+_ROUTE_CACHE_MAX_ENTRIES = 4096
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, in-flight and status counts.
+
+    Routes are labelled by their path template (e.g. /api/v1/users/me), never
+    the raw path, and unknown methods as OTHER, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        # (method, path) -> (route template, in-flight gauge, latency histogram)
+        self._route_cache: dict[tuple[str, str], tuple] = {}
+
+    def _resolve(self, scope: Scope, method: str) -> tuple:
+        key = (method, scope["path"])
+        resolved = self._route_cache.get(key)
+        if resolved is None:
+            route = UNMATCHED_ROUTE
+            for candidate in scope["app"].routes:
+                # Not every routing entry has a path template (e.g. included routers).
+                path = getattr(candidate, "path", None)
+                if path is None:
+                    continue
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    route = path
+                    break
+                if match == Match.PARTIAL and route == UNMATCHED_ROUTE:
+                    route = path
+            resolved = (
+                route,
+                http_requests_in_flight.labels(method, route),
+                http_request_duration_seconds.labels(method, route),
+            )
+            if len(self._route_cache) < _ROUTE_CACHE_MAX_ENTRIES:
+                self._route_cache[key] = resolved
+        return resolved
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in _KNOWN_METHODS else OTHER_METHOD
+        route, in_flight, duration = self._resolve(scope, method)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration.observe(time.perf_counter() - started)
+            http_requests_total.labels(method, route, str(status_code)).inc()
+            in_flight.dec()
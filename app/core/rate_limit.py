@@ -0,0 +1,168 @@
+"""
+Rate limiting for the expensive auth endpoints.
+
+Each route has token buckets keyed by client IP and by the email in the
+request body (RATE_LIMITS). The check runs as a route dependency, before
+the body reaches any database session or Supabase call; a spent bucket
+raises RateLimitExceeded, answered with 429 and Retry-After.
+
+MemoryRateLimitBackend keeps buckets per worker process: O(1) per hit,
+bounded to RATE_LIMIT_MAX_KEYS with least-recently-used eviction, and keys
+idle long enough to have refilled are dropped since they are
+indistinguishable from new ones. A shared store (Redis, Postgres) only has to
+implement RateLimitBackend.hit().
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY, CallbackMetric
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+
+
+class RateLimitExceeded(Exception):
+    """A client spent its bucket (mapped to 429)."""
+
+    def __init__(self, route: str, key_type: str, retry_after: float) -> None:
+        super().__init__(f"rate limit for {route} by {key_type} exceeded")
+        self.route = route
+        self.key_type = key_type
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Rate:
+    """`capacity` requests at once, refilled at `capacity` per `period` seconds."""
+
+    capacity: int
+    period: float
+
+    @property
+    def per_second(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """'5/minute', '100/hour', ... ; plural units are accepted."""
+        count, _, unit = value.partition("/")
+        period = _PERIODS.get(unit.strip().lower().rstrip("s"))
+        if period is None or not count.strip().isdigit() or int(count) <= 0:
+            raise ValueError(f"invalid rate {value!r}, expected '<count>/<second|minute|hour|day>'")
+        return cls(int(count), period)
+
+
+# ===== Backends =====
+class RateLimitBackend(ABC):
+    """Where buckets live. hit() returns 0 if allowed, else seconds until the next token."""
+
+    @abstractmethod
+    async def hit(self, key: str, rate: Rate) -> float: ...
+
+    def size(self) -> int:
+        return 0
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Token buckets in an LRU-ordered dict, per worker process."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self.evictions = 0
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        return self.hit_sync(key, rate)
+
+    def hit_sync(self, key: str, rate: Rate, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                tokens = float(rate.capacity)
+            else:
+                tokens = min(rate.capacity, bucket[0] + (now - bucket[1]) * rate.per_second)
+
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / rate.per_second
+            full_at = now + (rate.capacity - tokens) / rate.per_second
+            self._buckets[key] = [tokens, now, full_at]
+            self._evict(now)
+        return retry_after
+
+    def _evict(self, now: float) -> None:
+        # Least recently used first: drop buckets that have refilled, then any over the cap.
+        while self._buckets:
+            oldest_key, oldest = next(iter(self._buckets.items()))
+            if oldest[2] > now and len(self._buckets) <= self.max_keys:
+                break
+            del self._buckets[oldest_key]
+            self.evictions += 1
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+backend: RateLimitBackend = MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+rate_limit_rejections_total = REGISTRY.counter(
+    "rate_limit_rejections_total", "Requests answered with 429", ["route", "key_type"]
+)
+REGISTRY.register(
+    CallbackMetric("rate_limit_keys", "Buckets held by this worker", [], lambda: [((), backend.size())])
+)
+
+
+# ===== Dependencies =====
+def _client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def _body_email(request: Request) -> str | None:
+    try:
+        # FastAPI has already read and parsed the body; this is the cached value.
+        body: Any = await request.json()
+    except Exception:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def rate_limit(route: str) -> Callable[[Request], Awaitable[None]]:
+    """Route dependency enforcing RATE_LIMITS[route]; list it in the decorator's dependencies."""
+    rates = {key_type: Rate.parse(value) for key_type, value in settings.RATE_LIMITS.get(route, {}).items()}
+    unknown = set(rates) - {"ip", "email"}
+    if unknown:
+        raise ValueError(f"RATE_LIMITS[{route!r}] has unknown key types {sorted(unknown)}")
+
+    async def check(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED or not rates:
+            return
+        keys = {"ip": _client_ip(request)}
+        if "email" in rates:
+            keys["email"] = await _body_email(request)
+        for key_type, rate in rates.items():
+            if keys.get(key_type) is None:
+                continue
+            retry_after = await backend.hit(f"{route}:{key_type}:{keys[key_type]}", rate)
+            if retry_after > 0:
+                rate_limit_rejections_total.labels(route, key_type).inc()
+                raise RateLimitExceeded(route, key_type, retry_after)
+
+    return check
@@ -0,0 +1,137 @@
+"""
+Failure isolation for calls to external services.
+
+A CircuitBreaker stops calling a dependency that keeps failing, so requests
+fail fast with ServiceUnavailable (503) instead of each waiting out a
+timeout. retry_delays() yields jittered exponential backoff for idempotent
+calls.
+"""
+
+import random
+import threading
+import time
+from typing import Iterator
+
+
+class ServiceUnavailable(Exception):
+    """An upstream dependency is down, timing out or behind an open breaker (mapped to 503)."""
+
+    def __init__(self, service: str, reason: str, retry_after: float = 1.0) -> None:
+        super().__init__(f"{service} unavailable: {reason}")
+        self.service = service
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; open rejects
+    calls for `reset_timeout` seconds, then half-open lets `half_open_max_calls`
+    probes through: one success closes the breaker, one failure re-opens it.
+    A probe that ends without a verdict (cancelled) gives its slot back with
+    release_probe(); slots still held after `reset_timeout` are reclaimed.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._half_opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._retry_in() <= 0:
+                return self.HALF_OPEN
+            return self._state
+
+    def _retry_in(self) -> float:
+        return self._opened_at + self.reset_timeout - time.monotonic()
+
+    def before_call(self) -> None:
+        """Raise ServiceUnavailable if the call must not go through."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._state == self.OPEN:
+                retry_in = self._retry_in()
+                if retry_in > 0:
+                    self.rejected += 1
+                    raise ServiceUnavailable(self.name, "circuit open", retry_after=retry_in)
+                self._state = self.HALF_OPEN
+                self._probes = 0
+                self._half_opened_at = time.monotonic()
+            if self._state == self.HALF_OPEN:
+                if (
+                    self._probes >= self.half_open_max_calls
+                    and time.monotonic() - self._half_opened_at >= self.reset_timeout
+                ):
+                    # Probes that never reported back; let new ones through.
+                    self._probes = 0
+                    self._half_opened_at = time.monotonic()
+                if self._probes >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise ServiceUnavailable(
+                        self.name, "circuit half-open", retry_after=self.reset_timeout
+                    )
+                self._probes += 1
+
+    def release_probe(self) -> None:
+        """The call ended without a verdict on the service (e.g. cancelled)."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.trips += 1
+
+    def as_dict(self) -> dict[str, str | int]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+def retry_delays(retries: int, base: float, cap: float = 2.0) -> Iterator[float]:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))."""
+    for attempt in range(retries):
+        yield random.uniform(0, min(cap, base * 2**attempt))
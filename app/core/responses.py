@@ -0,0 +1,112 @@
+"""
+Fast JSON responses.
+
+Routes return pre-encoded bytes built from precompiled TypeAdapters, so FastAPI
+skips re-validating the response model and running jsonable_encoder. The
+routes still declare response_model so the OpenAPI schema stays accurate.
+
+User representations carry a strong ETag built from the row version, so a
+matching If-None-Match is answered with 304 before anything is serialized.
+"""
+
+import uuid
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from app.models.users import User
+from app.schemas.users import AuthResponse, LocalAuthResponse, TokenPair, UserPublic, UsersPublic
+
+user_public_adapter = TypeAdapter(UserPublic)
+users_public_adapter = TypeAdapter(UsersPublic)
+auth_response_adapter = TypeAdapter(AuthResponse)
+token_pair_adapter = TypeAdapter(TokenPair)
+local_auth_response_adapter = TypeAdapter(LocalAuthResponse)
+
+_USER_PUBLIC_FIELDS = tuple(UserPublic.model_fields)
+
+# Per-user bodies: browsers may keep them but must revalidate each time.
+_REVALIDATE = {"Cache-Control": "private, no-cache"}
+
+
+def json_response(
+    adapter: TypeAdapter,
+    value: Any,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def _user_public(user: User) -> UserPublic:
+    # Rows come from our own table: skip re-validation (EmailStr checks dominate the cost).
+    return UserPublic.model_construct(
+        **{field: getattr(user, field) for field in _USER_PUBLIC_FIELDS}
+    )
+
+
+# ===== Conditional requests =====
+def user_etag(user_id: uuid.UUID | str, version: int | None) -> str:
+    # Users still in the write-behind buffer have no version yet; their row starts at 1.
+    return f'"{user_id}.{version or 1}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **_REVALIDATE})
+
+
+def user_public_response(user: User, headers: dict[str, str] | None = None) -> Response:
+    return json_response(user_public_adapter, _user_public(user), headers=headers)
+
+
+def user_conditional_response(user: User) -> Response:
+    """A single user with its ETag, for routes that honour If-None-Match."""
+    return user_public_response(
+        user, headers={"ETag": user_etag(user.id, user.version), **_REVALIDATE}
+    )
+
+
+def users_public_response(
+    users: list[User], count: int, next_cursor: str | None = None
+) -> Response:
+    return json_response(
+        users_public_adapter,
+        UsersPublic.model_construct(
+            data=[_user_public(user) for user in users],
+            count=count,
+            next_cursor=next_cursor,
+        ),
+    )
+
+
+def auth_response(access_token: str, user: User, status_code: int = 200) -> Response:
+    return json_response(
+        auth_response_adapter,
+        AuthResponse.model_construct(access_token=access_token, user=_user_public(user)),
+        status_code=status_code,
+    )
+
+
+def token_pair_response(tokens: TokenPair, user: User | None = None) -> Response:
+    """Tokens from the local auth backend, with the user on login."""
+    if user is None:
+        return json_response(token_pair_adapter, tokens)
+    return json_response(
+        local_auth_response_adapter,
+        LocalAuthResponse.model_construct(**tokens.__dict__, user=_user_public(user)),
+    )
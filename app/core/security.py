@@ -1,21 +1,83 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Callable, TypeVar
 
 import jwt
+from jwt import PyJWKClient
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.metrics import REGISTRY
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PASSWORD_HASH_SCHEMES = ("bcrypt", "bcrypt_sha256", "argon2")
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+
+def build_password_context(scheme: str | None = None, **costs: int) -> CryptContext:
+    """
+    Hash with `scheme` (default PASSWORD_HASH_SCHEME) at the configured costs;
+    `costs` overrides bcrypt_rounds, argon2_time_cost, argon2_memory_cost or
+    argon2_parallelism. Hashes from the other schemes, or below the current
+    cost, still verify but report needs_update.
+    """
+    scheme = scheme or settings.PASSWORD_HASH_SCHEME
+    rounds = costs.get("bcrypt_rounds", settings.PASSWORD_BCRYPT_ROUNDS)
+    return CryptContext(
+        schemes=[scheme, *(other for other in PASSWORD_HASH_SCHEMES if other != scheme)],
+        default=scheme,
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt_sha256__rounds=rounds,
+        bcrypt_sha256__min_rounds=rounds,
+        argon2__type="ID",
+        argon2__rounds=costs.get("argon2_time_cost", settings.PASSWORD_ARGON2_TIME_COST),
+        argon2__memory_cost=costs.get("argon2_memory_cost", settings.PASSWORD_ARGON2_MEMORY_COST),
+        argon2__parallelism=costs.get("argon2_parallelism", settings.PASSWORD_ARGON2_PARALLELISM),
+    )
+
+
+pwd_context = build_password_context()
 
 
 ALGORITHM = "HS256"
+SUPABASE_JWKS_ALGORITHMS = ["RS256", "ES256"]
+
+_jwks_client: PyJWKClient | None = None
+
+T = TypeVar("T")
+
+password_hash_duration_seconds = REGISTRY.histogram(
+    "password_hash_duration_seconds",
+    "Async password hashing latency, including time queued for a worker",
+    ["operation"],
+)
+password_hash_scheme_seconds = REGISTRY.histogram(
+    "password_hash_scheme_seconds",
+    "CPU time of one hash or verify by scheme, excluding time queued",
+    ["scheme", "operation"],
+)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the password hashing queue is full (mapped to 503)."""
  
  
+def _secret_key() -> str:
+    if not settings.SECRET_KEY:
+        raise ValueError("SECRET_KEY is not configured")
+    return settings.SECRET_KEY
+
+
 def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    now = datetime.now(timezone.utc)
+    # "type" keeps these apart from Supabase tokens and from anything else signed with SECRET_KEY.
+    to_encode = {"exp": now + expires_delta, "iat": now, "sub": str(subject), "type": "access"}
+    encoded_jwt = jwt.encode(to_encode, _secret_key(), algorithm=ALGORITHM)
     return encoded_jwt
  
  
@@ -25,23 +87,201 @@ def decode_access_token(token: str) -> str:
     Raises ValueError on invalid/expired tokens.
     """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        subject = payload.get("sub")
-        if subject is None:
-            raise ValueError("Token missing subject")
-        return str(subject)
+        payload = jwt.decode(
+            token, _secret_key(), algorithms=[ALGORITHM], options={"require": ["exp", "sub"]}
+        )
+        if payload.get("type") != "access":
+            raise ValueError("Not an access token")
+        return str(payload["sub"])
     except Exception as exc:
         raise ValueError(f"Invalid token: {exc}")
 
 
-def _truncate_password(password: str) -> str:
-    """Bcrypt only considers first 72 bytes; truncate to avoid errors."""
-    return password[:72]
- 
- 
+def _get_jwks_client() -> PyJWKClient:
+    """Return the process-wide JWKS client (keys are cached and refetched on unknown kid)."""
+    global _jwks_client
+    if _jwks_client is None:
+        _jwks_client = PyJWKClient(
+            settings.SUPABASE_JWKS_URL
+            or f"{settings.SUPABASE_AUTH_URL}/.well-known/jwks.json",
+            cache_keys=True,
+            lifespan=settings.SUPABASE_JWKS_CACHE_SECONDS,
+            headers={"apikey": settings.SUPABASE_KEY},
+        )
+    return _jwks_client
+
+
+def decode_supabase_token(token: str) -> dict[str, Any]:
+    """
+    Verify a Supabase-issued access token locally and return its claims.
+    HS256 tokens are checked against SUPABASE_JWT_SECRET, RS256/ES256 tokens
+    against the project's JWKS. Raises ValueError on invalid/expired tokens.
+    """
+    try:
+        algorithm = jwt.get_unverified_header(token).get("alg")
+        if algorithm == ALGORITHM:
+            if not settings.SUPABASE_JWT_SECRET:
+                raise ValueError("SUPABASE_JWT_SECRET is not configured")
+            key: Any = settings.SUPABASE_JWT_SECRET
+        elif algorithm in SUPABASE_JWKS_ALGORITHMS:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+        else:
+            raise ValueError(f"Unsupported algorithm {algorithm!r}")
+
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=settings.SUPABASE_JWT_AUDIENCE,
+            issuer=settings.SUPABASE_JWT_ISSUER or settings.SUPABASE_AUTH_URL,
+            options={"require": ["exp", "sub"]},
+        )
+    except Exception as exc:
+        raise ValueError(f"Invalid token: {exc}")
+
+
+def peek_token_expiry(token: str) -> float | None:
+    """Return the exp claim without verifying the signature (only use on verified tokens)."""
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return None
+    return float(exp) if exp is not None else None
+
+
+# ===== Password hashing =====
+def _scheme_of(hashed_password: str) -> str:
+    return pwd_context.identify(hashed_password, required=False) or "unknown"
+
+
+def _secret_for(scheme: str, password: str) -> str | bytes:
+    """
+    Plain bcrypt only reads the first 72 bytes; cut there (in bytes, not
+    characters) so long or multi-byte passwords hash the same as they always
+    have. bcrypt_sha256 and argon2 take the whole password.
+    """
+    if scheme != "bcrypt":
+        return password
+    encoded = password.encode("utf-8")
+    return encoded[:BCRYPT_MAX_PASSWORD_BYTES] if len(encoded) > BCRYPT_MAX_PASSWORD_BYTES else password
+
+
+def _timed_verify(plain_password: str, hashed_password: str) -> tuple[bool, float]:
+    started = time.perf_counter()
+    valid = pwd_context.verify(_secret_for(_scheme_of(hashed_password), plain_password), hashed_password)
+    return valid, time.perf_counter() - started
+
+
+def _timed_hash(password: str) -> tuple[str, float]:
+    started = time.perf_counter()
+    hashed = pwd_context.hash(_secret_for(pwd_context.default_scheme(), password))
+    return hashed, time.perf_counter() - started
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(_truncate_password(plain_password), hashed_password)
- 
- 
+    valid, seconds = _timed_verify(plain_password, hashed_password)
+    password_hash_scheme_seconds.labels(_scheme_of(hashed_password), "verify").observe(seconds)
+    return valid
+
+
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(_truncate_password(password))
\ No newline at end of file
+    hashed, seconds = _timed_hash(password)
+    password_hash_scheme_seconds.labels(pwd_context.default_scheme(), "hash").observe(seconds)
+    return hashed
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True for hashes from another scheme or below the configured cost."""
+    return pwd_context.needs_update(hashed_password)
+
+
+def calibrate_password_hashing(
+    scheme: str, target_seconds: float, *, samples: int = 3, **costs: int
+) -> tuple[dict[str, int], float]:
+    """
+    Raise the scheme's cost until one hash takes about `target_seconds` here.
+    bcrypt steps its rounds (each doubles the time); argon2 steps time_cost
+    at the given (or configured) memory_cost and parallelism. Returns the
+    highest cost whose median hash time stays within the target (or the
+    minimum cost if none does) and that time.
+    """
+    if scheme == "argon2":
+        key, costs_to_try = "argon2_time_cost", range(1, 101)
+    else:
+        key, costs_to_try = "bcrypt_rounds", range(4, 32)
+    best: tuple[dict[str, int], float] | None = None
+    for cost in costs_to_try:
+        context = build_password_context(scheme, **{**costs, key: cost})
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            context.hash("calibration-password")
+            timings.append(time.perf_counter() - started)
+        seconds = sorted(timings)[len(timings) // 2]
+        if best is not None and seconds > target_seconds:
+            break
+        best = ({**costs, key: cost}, seconds)
+        if seconds > target_seconds:
+            break  # even the minimum cost is over the target
+    assert best is not None
+    return best
+
+
+# ===== Async hashing (process pool) =====
+_hash_executor: ProcessPoolExecutor | None = None
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is None:
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _hash_executor
+
+
+async def _run_hash_job(operation: str, func: Callable[..., T], *args: Any) -> T:
+    """
+    Run a hashing job off the event loop. At most PASSWORD_HASH_QUEUE_DEPTH jobs
+    may be running or queued; beyond that PasswordHashingBusy is raised at once.
+    """
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= settings.PASSWORD_HASH_QUEUE_DEPTH:
+            raise PasswordHashingBusy()
+        _hash_pending += 1
+    started = time.perf_counter()
+    try:
+        if settings.PASSWORD_HASH_WORKERS <= 0:
+            return await asyncio.to_thread(func, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        password_hash_duration_seconds.labels(operation).observe(time.perf_counter() - started)
+        with _hash_lock:
+            _hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    hashed, seconds = await _run_hash_job("hash", _timed_hash, password)
+    password_hash_scheme_seconds.labels(pwd_context.default_scheme(), "hash").observe(seconds)
+    return hashed
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    valid, seconds = await _run_hash_job("verify", _timed_verify, plain_password, hashed_password)
+    password_hash_scheme_seconds.labels(_scheme_of(hashed_password), "verify").observe(seconds)
+    return valid
+
+
+def shutdown_password_hashing() -> None:
+    """Stop the hashing worker processes (called from the app lifespan)."""
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=True, cancel_futures=True)
+        _hash_executor = None
@@ -0,0 +1,39 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class StartupReport:
+    """Wall-clock time of each startup phase (phases may overlap when run concurrently)."""
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.total: float | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    async def run(self, name: str, awaitable: Awaitable[T]) -> T:
+        with self.phase(name):
+            return await awaitable
+
+    def finish(self) -> None:
+        self.total = time.perf_counter() - self._started
+        breakdown = ", ".join(
+            f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.phases.items()
+        )
+        logger.info("Startup completed in %.0fms (%s)", self.total * 1000, breakdown)
+
+    def as_dict(self) -> dict[str, float | dict[str, float] | None]:
+        return {"total": self.total, "phases": dict(self.phases)}
@@ -0,0 +1,201 @@
+"""
+Connection pool instrumentation.
+
+Engines are created with the Instrumented* pool classes below, which time
+every checkout, and instrument_engine() hooks SQLAlchemy pool events to
+track connection lifetimes. pool_stats() returns a snapshot of every
+instrumented engine.
+"""
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from app.core.metrics import REGISTRY, CallbackMetric
+
+db_pool_checkout_wait_seconds = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ["engine"]
+)
+
+
+class PoolMetrics:
+    """Counters, checkout wait histogram and open-connection ages for one pool."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.pool: Pool | None = None
+        self.checkout_wait = db_pool_checkout_wait_seconds.labels(name)
+        self._lock = threading.Lock()
+        self._opened_at: dict[int, float] = {}
+        self.connects = 0
+        self.closes = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    # ===== Pool event handlers =====
+    def on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+            self._opened_at[id(connection_record)] = time.monotonic()
+
+    def on_close(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.closes += 1
+            self._opened_at.pop(id(connection_record), None)
+
+    def on_close_detached(self, dbapi_connection) -> None:
+        self._count("closes")
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self._count("checkouts")
+
+    def on_checkin(self, dbapi_connection, connection_record) -> None:
+        self._count("checkins")
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self._count("invalidations")
+
+    # ===== Snapshot =====
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - opened for opened in self._opened_at.values()]
+            counters = {
+                "connects": self.connects,
+                "closes": self.closes,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+            }
+
+        pool = self.pool
+        state: dict[str, Any] = {"pool_class": type(pool).__name__ if pool else None}
+        if isinstance(pool, QueuePool):
+            state.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                # QueuePool counts overflow from -pool_size; only positive values are in use.
+                overflow_in_use=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+                timeout=pool.timeout(),
+            )
+
+        return {
+            **state,
+            **counters,
+            "checkout_wait_seconds": self.checkout_wait.as_dict(),
+            "connection_age_seconds": {
+                "open": len(ages),
+                "max": max(ages, default=0.0),
+                "mean": sum(ages) / len(ages) if ages else 0.0,
+            },
+        }
+
+
+class _TimedCheckoutMixin:
+    """Time how long callers wait for a connection (includes opening a new one)."""
+
+    metrics: PoolMetrics | None = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics._count("timeouts")
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.checkout_wait.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool; keep reporting to the same metrics.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckoutMixin, NullPool):
+    """Opens a connection per checkout (sync or async); the wait is the connect time."""
+
+
+_registry: dict[str, PoolMetrics] = {}
+
+
+def instrument_engine(engine: Engine, name: str) -> PoolMetrics:
+    """Attach pool metrics to a (sync) engine; pass `async_engine.sync_engine` for async ones."""
+    metrics = PoolMetrics(name)
+    metrics.pool = engine.pool
+    if isinstance(engine.pool, _TimedCheckoutMixin):
+        engine.pool.metrics = metrics
+
+    event.listen(engine, "connect", metrics.on_connect)
+    event.listen(engine, "close", metrics.on_close)
+    event.listen(engine, "close_detached", metrics.on_close_detached)
+    event.listen(engine, "checkout", metrics.on_checkout)
+    event.listen(engine, "checkin", metrics.on_checkin)
+    event.listen(engine, "invalidate", metrics.on_invalidate)
+
+    _registry[name] = metrics
+    return metrics
+
+
+def get_pool_metrics(name: str) -> PoolMetrics | None:
+    return _registry.get(name)
+
+
+def pool_stats() -> dict[str, dict[str, Any]]:
+    """Snapshot of every engine built so far in this process, keyed by engine name."""
+    return {name: metrics.snapshot() for name, metrics in _registry.items()}
+
+
+def _collect(*path: str):
+    def collect():
+        for name, snapshot in pool_stats().items():
+            value: Any = snapshot
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            if value is not None:
+                yield (name,), value
+
+    return collect
+
+
+for _metric, _doc, _path in (
+    ("db_pool_size", "Configured base pool size", ("size",)),
+    ("db_pool_checked_out", "Connections currently checked out", ("checked_out",)),
+    ("db_pool_overflow_in_use", "Overflow connections currently open", ("overflow_in_use",)),
+    ("db_pool_open_connections", "Open connections", ("connection_age_seconds", "open")),
+    ("db_pool_connection_age_max_seconds", "Age of the oldest open connection", ("connection_age_seconds", "max")),
+):
+    REGISTRY.register(CallbackMetric(_metric, _doc, ["engine"], _collect(*_path)))
+
+for _counter in ("connects", "checkouts", "invalidations", "timeouts"):
+    REGISTRY.register(
+        CallbackMetric(
+            f"db_pool_{_counter}_total", f"Pool {_counter}", ["engine"], _collect(_counter), type="counter"
+        )
+    )
@@ -0,0 +1,284 @@
+"""
+Read replica routing.
+
+ReadSessionLocal / AsyncReadSessionLocal build sessions whose get_bind()
+sends plain SELECTs to a replica and everything else to the primary. The
+first write (flush, DML, SELECT ... FOR UPDATE, raw SQL) pins the session to
+the primary, so a request's writes and the reads that follow them see the
+same data. Each session sticks to one replica for a consistent view.
+
+Replicas are picked round-robin or by fewest checked-out connections. A
+background task measures replay lag; replicas that are behind by more than
+DB_REPLICA_MAX_LAG_SECONDS or fail the check are skipped until they recover,
+and with no healthy replica reads fall back to the primary.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+from typing import Any, AsyncGenerator, Generator
+
+from sqlalchemy import Delete, Engine, Insert, Select, Update, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY, CallbackMetric
+from app.db.session import build_async_engine, build_engine, get_async_engine, get_sync_engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds of replay lag; 0 when everything received has been replayed (an idle
+# primary would otherwise look more and more "behind"), NULL-safe on a primary.
+_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+def _with_driver(uri: str, driver: str) -> str:
+    return make_url(uri).set(drivername=f"postgresql+{driver}").render_as_string(hide_password=False)
+
+
+class Replica:
+    """One replica URI with lazily built sync/async engines and its last health check."""
+
+    def __init__(self, name: str, uri: str) -> None:
+        self.name = name
+        self.uri = uri
+        self.healthy = True
+        self.lag_seconds: float | None = None
+        self._sync_engine: Engine | None = None
+        self._async_engine: AsyncEngine | None = None
+        self._lock = threading.Lock()
+
+    def sync_engine(self) -> Engine:
+        if self._sync_engine is None:
+            with self._lock:
+                if self._sync_engine is None:
+                    self._sync_engine = build_engine(_with_driver(self.uri, "psycopg"), f"{self.name}-sync")
+        return self._sync_engine
+
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            with self._lock:
+                if self._async_engine is None:
+                    self._async_engine = build_async_engine(
+                        _with_driver(self.uri, "asyncpg"), f"{self.name}-async"
+                    )
+        return self._async_engine
+
+    def engine_for(self, kind: str) -> Engine:
+        """The Engine a Session binds to; AsyncSession needs the async engine's sync_engine."""
+        return self.sync_engine() if kind == "sync" else self.async_engine().sync_engine
+
+    def checked_out(self, kind: str) -> int:
+        engine = self._sync_engine if kind == "sync" else self._async_engine
+        if engine is None:
+            return 0
+        pool = engine.pool if kind == "sync" else engine.sync_engine.pool
+        return pool.checkedout()
+
+    async def dispose(self) -> None:
+        if self._sync_engine is not None:
+            self._sync_engine.dispose()
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
+
+class ReplicaRouter:
+    """Picks a healthy replica for a new read session and runs the lag checks."""
+
+    def __init__(self, uris: list[str]) -> None:
+        self.replicas = [Replica(f"replica-{i}", uri) for i, uri in enumerate(uris)]
+        self._next = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self, kind: str) -> Replica | None:
+        """A healthy replica, or None to read from the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        start = next(self._next) % len(healthy)
+        rotated = healthy[start:] + healthy[:start]
+        if settings.DB_REPLICA_BALANCING == "least_connections":
+            # min() keeps the first of equals, so ties still rotate.
+            return min(rotated, key=lambda replica: replica.checked_out(kind))
+        return rotated[0]
+
+    async def check(self) -> None:
+        """Measure every replica's lag and update which ones take reads."""
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        async def measure() -> float:
+            async with replica.async_engine().connect() as conn:
+                return float(await conn.scalar(_LAG_SQL))
+
+        try:
+            # A replica that can't answer within one interval is as good as down.
+            replica.lag_seconds = await asyncio.wait_for(
+                measure(), timeout=settings.DB_REPLICA_HEALTH_CHECK_SECONDS
+            )
+            healthy = replica.lag_seconds <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            reason = f"lag {replica.lag_seconds:.1f}s"
+        except Exception as exc:
+            replica.lag_seconds = None
+            healthy = False
+            reason = f"health check failed: {exc!r}"
+
+        if healthy != replica.healthy:
+            log = logger.info if healthy else logger.warning
+            log("%s is %s rotation (%s)", replica.name, "back in" if healthy else "out of", reason)
+        replica.healthy = healthy
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(settings.DB_REPLICA_HEALTH_CHECK_SECONDS)
+
+    async def start(self) -> None:
+        """Check once before serving, then keep checking in the background."""
+        if not self.enabled or self._task is not None:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.gather(*(replica.dispose() for replica in self.replicas))
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        return {
+            replica.name: {"healthy": replica.healthy, "lag_seconds": replica.lag_seconds}
+            for replica in self.replicas
+        }
+
+
+replica_router = ReplicaRouter([uri for uri in settings.DATABASE_REPLICA_URIS if uri])
+
+
+def _collect(key: str):
+    def collect():
+        for name, state in replica_router.as_dict().items():
+            if state[key] is not None:
+                yield (name,), float(state[key])
+
+    return collect
+
+
+REGISTRY.register(
+    CallbackMetric("db_replica_healthy", "1 while the replica takes reads", ["replica"], _collect("healthy"))
+)
+REGISTRY.register(
+    CallbackMetric("db_replica_lag_seconds", "Replay lag at the last health check", ["replica"], _collect("lag_seconds"))
+)
+db_session_reads_total = REGISTRY.counter(
+    "db_session_reads_total", "Read sessions by where their first read went", ["target"]
+)
+
+
+# ===== Routing sessions =====
+def _is_read(clause: Any) -> bool:
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    if isinstance(clause, (Insert, Update, Delete)) or clause is None:
+        return False
+    # Raw SQL can write; callers mark it safe with .execution_options(read_only=True).
+    return bool(getattr(clause, "_execution_options", {}).get("read_only"))
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica until its first write, then stays on the primary."""
+
+    kind = "sync"
+
+    def __init__(self, **kw: Any) -> None:
+        super().__init__(**kw)
+        self._pinned_to_primary = False
+        self._replica: Replica | None = None
+        self._replica_chosen = False
+
+    def _primary(self) -> Engine:
+        return get_sync_engine()
+
+    def pin_to_primary(self) -> bool:
+        """Send the rest of this session to the primary; False if it was already there."""
+        was_on_replica = not self._pinned_to_primary and self._replica is not None
+        self._pinned_to_primary = True
+        return was_on_replica
+
+    def get_bind(self, mapper=None, *, clause=None, **kw: Any) -> Engine:
+        if self._pinned_to_primary or self._flushing or not _is_read(clause):
+            self._pinned_to_primary = True
+            return self._primary()
+        if not self._replica_chosen:
+            self._replica = replica_router.choose(self.kind)
+            self._replica_chosen = True
+            db_session_reads_total.labels(self._replica.name if self._replica else "primary").inc()
+        if self._replica is None:
+            return self._primary()
+        return self._replica.engine_for(self.kind)
+
+
+class AsyncRoutingSession(RoutingSession):
+    """sync_session_class for AsyncSession; binds must be the async engines' sync_engine."""
+
+    kind = "async"
+
+    def _primary(self) -> Engine:
+        return get_async_engine().sync_engine
+
+
+def use_primary(session: Session | AsyncSession) -> bool:
+    """
+    Pin a routing session to the primary. Returns True when reads were going to a
+    replica, i.e. when retrying a miss on the primary could find a row the replica
+    hasn't replayed yet. Plain sessions already use the primary: always False.
+    """
+    sync_session = session.sync_session if isinstance(session, AsyncSession) else session
+    if isinstance(sync_session, RoutingSession):
+        return sync_session.pin_to_primary()
+    return False
+
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=AsyncRoutingSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """Dependency for sync sessions that read from a replica when one is configured."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for async sessions that read from a replica when one is configured."""
+    async with AsyncReadSessionLocal() as session:
+        yield session
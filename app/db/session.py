@@ -1,29 +1,160 @@
+import asyncio
 import logging
-from typing import AsyncGenerator, Generator
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Generator
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import Engine, create_engine, event, text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import REGISTRY
 from app.db.base import Base
+from app.db.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+    instrument_engine,
+)
 
 logger = logging.getLogger(__name__)
 
+ALEMBIC_SCRIPT_LOCATION = Path(__file__).resolve().parent.parent.parent / "alembic"
 
-# ===== Synchronous Database =====
-sync_engine = create_engine(
-    settings.DATABASE_URI,
-    pool_size=20,
-    max_overflow=10,
-    pool_pre_ping=True,
-    echo=settings.ENVIRONMENT == "local",
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker that builds its engine on first use."""
+
+    def __init__(self, engine_factory: Callable[[], Any], **kw: Any) -> None:
+        super().__init__(**kw)
+        self._engine_factory = engine_factory
+
+    def __call__(self, **local_kw: Any) -> Any:
+        if self.kw.get("bind") is None:
+            self.configure(bind=self._engine_factory())
+        return super().__call__(**local_kw)
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4().hex}__"
+
+
+def _connect_args(*, is_async: bool) -> dict[str, Any]:
+    """Driver options; transaction-mode poolers can't keep prepared statements between transactions."""
+    transaction_mode = settings.DB_POOLER_MODE == "transaction"
+    if not is_async:
+        # psycopg prepares a statement after 5 executions; None never does.
+        return {"prepare_threshold": None} if transaction_mode else {}
+
+    cache_size = settings.DB_STATEMENT_CACHE_SIZE
+    if cache_size is None:
+        cache_size = 0 if transaction_mode else 100
+    args: dict[str, Any] = {
+        "statement_cache_size": cache_size,  # asyncpg's own cache
+        "prepared_statement_cache_size": cache_size,  # SQLAlchemy's asyncpg adapter cache
+    }
+    if transaction_mode:
+        # The default __asyncpg_stmt_N__ names collide between clients sharing a server connection.
+        args["prepared_statement_name_func"] = _unique_statement_name
+    return args
+
+
+def _engine_options(*, is_async: bool) -> dict[str, Any]:
+    """Engine keyword arguments for the configured pool settings and DB_POOLER_MODE."""
+    pooled = settings.DB_POOLER_MODE != "direct"
+    pre_ping = settings.DB_POOL_PRE_PING
+    if pooled and "DB_POOL_PRE_PING" not in settings.model_fields_set:
+        # The pooler keeps its server connections alive; a ping is one more round trip per checkout.
+        pre_ping = False
+    options: dict[str, Any] = {
+        "pool_pre_ping": pre_ping,
+        "connect_args": _connect_args(is_async=is_async),
+    }
+
+    pool_size = (
+        settings.DB_POOLER_POOL_SIZE if settings.DB_POOLER_MODE == "transaction" else settings.DB_POOL_SIZE
+    )
+    if pool_size <= 0:
+        options["poolclass"] = InstrumentedNullPool
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+# ===== Query timing =====
+db_query_duration_seconds = REGISTRY.histogram(
+    "db_query_duration_seconds",
+    "Time spent executing SQL statements (cursor execute, excludes pool checkout)",
+    ["engine", "operation"],
 )
+_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY"})
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in _OPERATIONS else "OTHER"
+
+
+def _instrument_queries(engine: Engine, name: str) -> None:
+    """before/after_cursor_execute hooks; pass `async_engine.sync_engine` for async engines."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_query_duration_seconds.labels(name, _operation(statement)).observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # after_cursor_execute does not fire for failed statements.
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def build_engine(uri: str, name: str) -> Engine:
+    """Sync engine with the configured pool, pool metrics and query timing."""
+    engine = create_engine(uri, **_engine_options(is_async=False))
+    instrument_engine(engine, name)
+    _instrument_queries(engine, name)
+    return engine
 
-SyncSessionLocal = sessionmaker(
+
+def build_async_engine(uri: str, name: str) -> AsyncEngine:
+    """Async counterpart of build_engine."""
+    engine = create_async_engine(uri, **_engine_options(is_async=True))
+    instrument_engine(engine.sync_engine, name)
+    _instrument_queries(engine.sync_engine, name)
+    return engine
+
+
+# ===== Synchronous Database =====
+_sync_engine: Engine | None = None
+
+
+def get_sync_engine() -> Engine:
+    """Create the sync engine on first use; workers that only serve async routes never pay for it."""
+    global _sync_engine
+    if _sync_engine is None:
+        _sync_engine = build_engine(settings.DATABASE_URI, "sync")
+    return _sync_engine
+
+
+SyncSessionLocal = _LazySessionmaker(
+    get_sync_engine,
     autocommit=False,
     autoflush=False,
-    bind=sync_engine,
 )
 
 
@@ -37,16 +168,19 @@ def get_db() -> Generator[Session, None, None]:
 
 
 # ===== Async Database =====
-async_engine: AsyncEngine = create_async_engine(
-    settings.ASYNC_DATABASE_URI,
-    pool_size=20,
-    max_overflow=10,
-    pool_pre_ping=True,
-    echo=settings.ENVIRONMENT == "local",
-)
+_async_engine: AsyncEngine | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Create the async engine on first use."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = build_async_engine(settings.ASYNC_DATABASE_URI, "async")
+    return _async_engine
+
 
-AsyncSessionLocal = sessionmaker(
-    async_engine,
+AsyncSessionLocal = _LazySessionmaker(
+    get_async_engine,
     class_=AsyncSession,
     expire_on_commit=False,
     autocommit=False,
@@ -60,24 +194,92 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-async def warm_up_connections(num_connections: int = 10) -> None:
-    """Warm up database connection pool on startup."""
-    logger.info(f"Warming up {num_connections} database connections...")
+async def dispose_engines() -> None:
+    """Close every pooled connection (on shutdown, after requests have drained)."""
+    global _sync_engine, _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+    if _sync_engine is not None:
+        _sync_engine.dispose()
+        _sync_engine = None
 
-    connections = []
-    for _ in range(num_connections):
-        conn = await async_engine.connect()
-        connections.append(conn)
 
-    for conn in connections:
-        await conn.execute(text("SELECT 1"))
+def __getattr__(name: str) -> Any:
+    # Backwards compatible module attributes; engines are built lazily.
+    if name == "sync_engine":
+        return get_sync_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    for conn in connections:
-        await conn.close()
 
-    logger.info(f"Successfully warmed up {num_connections} connections")
+# ===== Startup =====
+async def warm_up_connections(num_connections: int | None = None) -> None:
+    """Open pool connections concurrently on startup."""
+    if num_connections is None:
+        num_connections = settings.DB_WARMUP_CONNECTIONS
+    # Overflow connections are closed again on checkin, so only warm the base pool.
+    if settings.DB_POOLER_MODE == "transaction":
+        num_connections = min(num_connections, settings.DB_POOLER_POOL_SIZE)
+    num_connections = min(num_connections, settings.DB_POOL_SIZE)
+    if num_connections <= 0:
+        return
+    logger.info("Warming up %d database connections...", num_connections)
 
+    engine = get_async_engine()
+    # Hold every connection at once so the pool really opens num_connections.
+    connections = await asyncio.gather(
+        *(engine.connect() for _ in range(num_connections))
+    )
+    try:
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in connections))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in connections))
+
+    logger.info("Successfully warmed up %d connections", num_connections)
 
-def init_db() -> None:
+
+async def init_db() -> None:
     """Initialize database (create tables if needed). Use Alembic in production."""
-    Base.metadata.create_all(bind=sync_engine)
\ No newline at end of file
+    async with get_async_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def check_migrations() -> bool:
+    """Compare the database's Alembic revision with the migration scripts' head(s)."""
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_SCRIPT_LOCATION))
+    expected = set(ScriptDirectory.from_config(config).get_heads())
+
+    async with get_async_engine().connect() as conn:
+        current = set(
+            await conn.run_sync(
+                lambda sync_conn: MigrationContext.configure(sync_conn).get_current_heads()
+            )
+        )
+
+    if current != expected:
+        logger.error(
+            "Database schema is at %s, expected Alembic head %s; run `alembic upgrade head`",
+            sorted(current) or "no revision",
+            sorted(expected),
+        )
+        return False
+    return True
+
+
+async def prepare_schema() -> None:
+    """create_all in local environments, a read-only Alembic head check elsewhere."""
+    mode = settings.DB_SCHEMA_STARTUP
+    if mode == "auto":
+        mode = "create_all" if settings.ENVIRONMENT == "local" else "alembic_check"
+
+    if mode == "create_all":
+        await init_db()
+    elif mode == "alembic_check":
+        await check_migrations()
@@ -1,8 +1,420 @@
-from supabase import Client, create_client
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+import httpx
+from supabase import (
+    AsyncClient,
+    AsyncClientOptions,
+    ASupabaseAuthClient,
+    Client,
+    ClientOptions,
+    SupabaseAuthClient,
+)
+
+from supabase_auth.errors import AuthRetryableError, AuthUnknownError
+from supabase_auth.helpers import parse_user_response
+from supabase_auth.types import AuthChangeEvent, Session, UserAttributes, UserResponse
 
 from app.core.config import settings
+from app.core.metrics import REGISTRY, CallbackMetric
+from app.core.resilience import CircuitBreaker, ServiceUnavailable, retry_delays
+
+T = TypeVar("T")
+
+# Per-request timeout for the sync client, set by call_supabase_auth_sync().
+_request_timeout: ContextVar[float | None] = ContextVar("supabase_request_timeout", default=None)
+
+
+class ConnectionStats:
+    """Counters for the shared Supabase HTTP pool (reused = requests - new connections)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    def record(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": max(self.requests - self.connections_opened, 0),
+            "tls_handshakes": self.tls_handshakes,
+        }
+
+
+connection_stats = ConnectionStats()
+
+
+# ===== Metrics =====
+supabase_auth_call_duration_seconds = REGISTRY.histogram(
+    "supabase_auth_call_duration_seconds",
+    "Supabase Auth call latency",
+    ["operation", "outcome"],
+)
+REGISTRY.register(
+    CallbackMetric(
+        "supabase_http_connection_events_total",
+        "Requests and connection setup on the shared Supabase HTTP pool",
+        ["event"],
+        lambda: (((event,), value) for event, value in connection_stats.as_dict().items()),
+        type="counter",
+    )
+)
+
+
+@contextmanager
+def timed_auth_call(operation: str) -> Iterator[None]:
+    """
+    Record the latency of a Supabase Auth call; wraps sync and awaited calls alike:
+
+        with timed_auth_call("sign_in_with_password"):
+            auth_resp = await supabase.auth.sign_in_with_password(...)
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        supabase_auth_call_duration_seconds.labels(operation, outcome).observe(
+            time.perf_counter() - started
+        )
+
+
+# ===== Resilience =====
+supabase_auth_breaker = CircuitBreaker(
+    "supabase_auth",
+    failure_threshold=settings.SUPABASE_AUTH_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.SUPABASE_AUTH_BREAKER_RESET_SECONDS,
+    half_open_max_calls=settings.SUPABASE_AUTH_BREAKER_HALF_OPEN_CALLS,
+)
+# Only calls that are safe to repeat are retried.
+IDEMPOTENT_AUTH_OPERATIONS = frozenset({"get_user"})
+
+supabase_auth_retries_total = REGISTRY.counter(
+    "supabase_auth_retries_total", "Supabase Auth calls retried after an outage error", ["operation"]
+)
+REGISTRY.register(
+    CallbackMetric(
+        "supabase_auth_circuit_state",
+        "1 for the breaker's current state",
+        ["state"],
+        lambda: (
+            ((state,), int(supabase_auth_breaker.state == state))
+            for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN)
+        ),
+    )
+)
+REGISTRY.register(
+    CallbackMetric(
+        "supabase_auth_circuit_trips_total",
+        "Times the breaker opened",
+        [],
+        lambda: [((), supabase_auth_breaker.trips)],
+        type="counter",
+    )
+)
+REGISTRY.register(
+    CallbackMetric(
+        "supabase_auth_circuit_rejected_total",
+        "Calls failed fast by the breaker",
+        [],
+        lambda: [((), supabase_auth_breaker.rejected)],
+        type="counter",
+    )
+)
+
+
+_TIMEOUT_ERRORS = (TimeoutError, asyncio.TimeoutError, httpx.TimeoutException)
+_OUTAGE_ERRORS = (*_TIMEOUT_ERRORS, httpx.TransportError, AuthRetryableError, AuthUnknownError)
+
+
+def _is_outage(exc: Exception) -> bool:
+    """Timeouts, transport errors and 5xx count against the breaker; 4xx answers do not."""
+    if isinstance(exc, _OUTAGE_ERRORS):
+        return True
+    status = getattr(exc, "status", None)
+    return isinstance(status, int) and status >= 500
+
+
+def _operation_timeout(operation: str) -> float:
+    return settings.SUPABASE_AUTH_TIMEOUTS.get(operation, settings.SUPABASE_AUTH_TIMEOUT)
+
+
+def _retry_delays(operation: str) -> Iterator[float]:
+    retries = settings.SUPABASE_AUTH_RETRIES if operation in IDEMPOTENT_AUTH_OPERATIONS else 0
+    return retry_delays(retries, settings.SUPABASE_AUTH_RETRY_BACKOFF_SECONDS)
+
+
+def _unavailable(exc: Exception) -> ServiceUnavailable:
+    reason = "timeout" if isinstance(exc, _TIMEOUT_ERRORS) else type(exc).__name__
+    return ServiceUnavailable(supabase_auth_breaker.name, reason)
+
+
+async def call_supabase_auth(
+    operation: str, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+) -> T:
+    """
+    Await a Supabase Auth call with a timeout, the circuit breaker and, for
+    idempotent operations, retries. Outages raise ServiceUnavailable; other
+    errors (bad credentials, ...) propagate unchanged.
+    """
+    delays = _retry_delays(operation)
+    timeout = _operation_timeout(operation)
+    while True:
+        supabase_auth_breaker.before_call()
+        try:
+            with timed_auth_call(operation):
+                result = await asyncio.wait_for(func(*args, **kwargs), timeout)
+        except Exception as exc:
+            if not _is_outage(exc):
+                supabase_auth_breaker.record_success()
+                raise
+            supabase_auth_breaker.record_failure()
+            delay = next(delays, None)
+            if delay is None:
+                raise _unavailable(exc) from exc
+            supabase_auth_retries_total.labels(operation).inc()
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled (client disconnect, shutdown): no verdict on the service.
+            supabase_auth_breaker.release_probe()
+            raise
+        supabase_auth_breaker.record_success()
+        return result
+
+
+def call_supabase_auth_sync(operation: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Blocking counterpart of call_supabase_auth; the timeout applies per HTTP request."""
+    delays = _retry_delays(operation)
+    token = _request_timeout.set(_operation_timeout(operation))
+    try:
+        while True:
+            supabase_auth_breaker.before_call()
+            try:
+                with timed_auth_call(operation):
+                    result = func(*args, **kwargs)
+            except Exception as exc:
+                if not _is_outage(exc):
+                    supabase_auth_breaker.record_success()
+                    raise
+                supabase_auth_breaker.record_failure()
+                delay = next(delays, None)
+                if delay is None:
+                    raise _unavailable(exc) from exc
+                supabase_auth_retries_total.labels(operation).inc()
+                time.sleep(delay)
+                continue
+            except BaseException:
+                supabase_auth_breaker.release_probe()
+                raise
+            supabase_auth_breaker.record_success()
+            return result
+    finally:
+        _request_timeout.reset(token)
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    """HTTP transport that counts requests and new TCP/TLS connections via httpcore tracing."""
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions["trace"] = self._trace
+        timeout = _request_timeout.get()
+        if timeout is not None:
+            request.extensions["timeout"] = httpx.Timeout(
+                timeout, connect=min(timeout, settings.SUPABASE_HTTP_CONNECT_TIMEOUT)
+            ).as_dict()
+        response = super().handle_request(request)
+        connection_stats.record("requests")
+        return response
+
+    @staticmethod
+    def _trace(event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            connection_stats.record("connections_opened")
+        elif event_name == "connection.start_tls.complete":
+            connection_stats.record("tls_handshakes")
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    """Async counterpart of _CountingTransport."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions["trace"] = self._trace
+        response = await super().handle_async_request(request)
+        connection_stats.record("requests")
+        return response
+
+    @staticmethod
+    async def _trace(event_name: str, info: dict) -> None:
+        _CountingTransport._trace(event_name, info)
+
+
+# ===== Session-less clients =====
+# One client serves every request in the worker, so it must not remember who
+# signed in last. supabase-py keeps the last session in memory even with
+# persist_session=False. Its auth-state listener also copies that user's
+# token into the Authorization header that every later auth call sends.
+# These auth clients never store a session or notify listeners: routes use
+# the AuthResponse they get back, and calls made as a user pass the token.
+def _auth_client_options(auth_url: str, client_options: ClientOptions | AsyncClientOptions) -> dict[str, Any]:
+    return {
+        "url": auth_url,
+        "auto_refresh_token": False,
+        "persist_session": False,
+        "storage": client_options.storage,
+        # A copy, so nothing written to the client's headers reaches auth calls.
+        "headers": dict(client_options.headers),
+        "flow_type": client_options.flow_type,
+        "http_client": client_options.httpx_client,
+    }
+
+
+class _SessionlessAuthClient(SupabaseAuthClient):
+    def _save_session(self, session: Session) -> None:
+        pass
+
+    def _notify_all_subscribers(self, event: AuthChangeEvent, session: Session | None) -> None:
+        pass
+
+    def update_user_with_token(self, access_token: str, attributes: UserAttributes) -> UserResponse:
+        """update_user() as the token's user (e.g. a password recovery link's access token)."""
+        return parse_user_response(self._request("PUT", "user", body=attributes, jwt=access_token))
+
+
+class _SessionlessAsyncAuthClient(ASupabaseAuthClient):
+    async def _save_session(self, session: Session) -> None:
+        pass
+
+    def _notify_all_subscribers(self, event: AuthChangeEvent, session: Session | None) -> None:
+        pass
+
+    async def update_user_with_token(self, access_token: str, attributes: UserAttributes) -> UserResponse:
+        """update_user() as the token's user (e.g. a password recovery link's access token)."""
+        return parse_user_response(await self._request("PUT", "user", body=attributes, jwt=access_token))
+
+
+class _SharedClient(Client):
+    @staticmethod
+    def _init_supabase_auth_client(auth_url: str, client_options: ClientOptions, **kwargs: Any):
+        return _SessionlessAuthClient(**_auth_client_options(auth_url, client_options))
+
+
+class _SharedAsyncClient(AsyncClient):
+    @staticmethod
+    def _init_supabase_auth_client(auth_url: str, client_options: AsyncClientOptions, **kwargs: Any):
+        return _SessionlessAsyncAuthClient(**_auth_client_options(auth_url, client_options))
+
+
+_client: Client | None = None
+_http_client: httpx.Client | None = None
+_async_client: AsyncClient | None = None
+_async_http_client: httpx.AsyncClient | None = None
+_client_lock = threading.Lock()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.SUPABASE_HTTP_TIMEOUT,
+        connect=settings.SUPABASE_HTTP_CONNECT_TIMEOUT,
+    )
+
+
+def _build_http_client() -> httpx.Client:
+    return httpx.Client(
+        transport=_CountingTransport(limits=_pool_limits()),
+        timeout=_timeout(),
+    )
+
+
+def init_supabase_client() -> Client:
+    """Create the process-wide Supabase client (called from the app lifespan)."""
+    global _client, _http_client
+    with _client_lock:
+        if _client is None:
+            _http_client = _build_http_client()
+            # Shared by all requests: its auth client keeps no session (see above).
+            _client = _SharedClient.create(
+                settings.SUPABASE_URL,
+                settings.SUPABASE_KEY,
+                options=ClientOptions(
+                    httpx_client=_http_client,
+                    auto_refresh_token=False,
+                    persist_session=False,
+                ),
+            )
+    return _client
+
+
+def close_supabase_client() -> None:
+    """Close the shared client's HTTP connection pool."""
+    global _client, _http_client
+    with _client_lock:
+        if _http_client is not None:
+            _http_client.close()
+        _client = None
+        _http_client = None
 
 
 def get_supabase_client() -> Client:
     """Return Supabase client for auth operations."""
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    return _client or init_supabase_client()
+
+
+# ===== Async Client =====
+async def init_async_supabase_client() -> AsyncClient:
+    """Create the process-wide async Supabase client (called from the app lifespan)."""
+    global _async_client, _async_http_client
+    if _async_client is None:
+        http_client = httpx.AsyncClient(
+            transport=_AsyncCountingTransport(limits=_pool_limits()),
+            timeout=_timeout(),
+        )
+        # Shared by all requests: its auth client keeps no session (see above).
+        client = await _SharedAsyncClient.create(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            options=AsyncClientOptions(
+                httpx_client=http_client,
+                auto_refresh_token=False,
+                persist_session=False,
+            ),
+        )
+        # Another coroutine may have finished first while we awaited.
+        if _async_client is None:
+            _async_client, _async_http_client = client, http_client
+        else:
+            await http_client.aclose()
+    return _async_client
+
+
+async def close_async_supabase_client() -> None:
+    """Close the shared async client's HTTP connection pool."""
+    global _async_client, _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+    _async_client = None
+    _async_http_client = None
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """Return async Supabase client for auth operations."""
+    return _async_client or await init_async_supabase_client()
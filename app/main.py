@@ -1,30 +1,79 @@
+import asyncio
+import math
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.core.config import settings
-from app.db.session import warm_up_connections, init_db
+from app.core.logging import configure_logging, stop_logging
+from app.core.middleware import MetricsMiddleware
+from app.core.rate_limit import RateLimitExceeded
+from app.core.resilience import ServiceUnavailable
+from app.core.security import PasswordHashingBusy, shutdown_password_hashing
+from app.core.startup import StartupReport
+from app.db.replicas import replica_router
+from app.db.session import dispose_engines, prepare_schema, warm_up_connections
+from app.db.supabase import (
+    close_async_supabase_client,
+    close_supabase_client,
+    init_async_supabase_client,
+    init_supabase_client,
+)
+from app.services.local_auth import refresh_token_purger
+from app.services.provisioning import ProvisioningBacklogFull, user_provisioner
+from app.services.user_cache import user_cache
 
 
+from app.routes.auth_local import router as auth_local_router
+from app.routes.internal import metrics_router, router as internal_router
 from app.routes.users import router as users_router
-from app.routes.auth import router as auth_router
+if settings.AUTH_ROUTES_MODE == "async":
+    from app.routes.auth_async import router as auth_router
+else:
+    from app.routes.auth import router as auth_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup
-    init_db()
-    await warm_up_connections(10)
+    configure_logging()
+    report = StartupReport()
+    if settings.AUTH_ROUTES_MODE == "sync":
+        with report.phase("supabase_client"):
+            init_supabase_client()
+    await asyncio.gather(
+        report.run("schema", prepare_schema()),
+        report.run("db_warmup", warm_up_connections()),
+        report.run("async_supabase_client", init_async_supabase_client()),
+        report.run("user_cache", user_cache.start()),
+        report.run("replicas", replica_router.start()),
+    )
+    await user_provisioner.start()
+    if settings.AUTH_BACKEND == "local" or settings.LOCAL_AUTH_ENABLED:
+        await refresh_token_purger.start()
+    report.finish()
+    app.state.startup_report = report.as_dict()
     yield
-    # Shutdown
-    # Add cleanup code here if needed
+    # Shutdown (the server has stopped accepting and drained in-flight requests)
+    await refresh_token_purger.stop()
+    await user_provisioner.stop()
+    await user_cache.stop()
+    await replica_router.stop()
+    close_supabase_client()
+    await close_async_supabase_client()
+    shutdown_password_hashing()
+    await dispose_engines()
+    stop_logging()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
@@ -36,6 +85,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    return ORJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(ProvisioningBacklogFull)
+async def provisioning_backlog_full_handler(request: Request, exc: ProvisioningBacklogFull):
+    return ORJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": str(max(1, math.ceil(settings.USER_PROVISIONING_FLUSH_INTERVAL_SECONDS)))},
+    )
+
+
+@app.exception_handler(ServiceUnavailable)
+async def service_unavailable_handler(request: Request, exc: ServiceUnavailable):
+    return ORJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is temporarily unavailable"},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    # Another request updated the same row first (users.version check)
+    return ORJSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "The resource was modified concurrently, please retry"},
+    )
+
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    return ORJSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many requests, please retry later"},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
 # Include API routers
 app.include_router(auth_router)
+if settings.AUTH_BACKEND == "local" or settings.LOCAL_AUTH_ENABLED:
+    app.include_router(auth_local_router)
 app.include_router(users_router)
+app.include_router(internal_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
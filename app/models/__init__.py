@@ -1 +1,2 @@
 from app.models.users import User
+from app.models.refresh_tokens import RefreshToken
@@ -0,0 +1,21 @@
+import uuid
+
+from sqlalchemy import Column, DateTime, ForeignKey, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+class RefreshToken(Base):
+    """Refresh tokens issued by the local auth backend; only a SHA-256 of the token is stored."""
+
+    __tablename__ = "refresh_tokens"
+
+    token_hash = Column(String(64), primary_key=True)
+    user_id = Column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    # Every rotation stays in its login's family; reusing a rotated token revokes the family.
+    family_id = Column(UUID(as_uuid=True), index=True, nullable=False, default=uuid.uuid4)
+    # Indexed for the periodic purge of expired rows
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, String, Boolean
+from sqlalchemy import Column, String, Boolean, Index, Integer, func, false as sa_false
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 
@@ -13,3 +13,17 @@ class User(Base):
     is_superuser = Column(Boolean, default=False)
     full_name = Column(String(255), nullable=True)
     hashed_password = Column(String, nullable=False)
+    # hashed_password is a credential this app manages (imported for local auth),
+    # not the copy written during Supabase signup; only these users get local tokens.
+    local_credentials = Column(Boolean, nullable=False, default=False, server_default=sa_false())
+    # Bumped by every ORM update (and checked, so concurrent updates fail with
+    # StaleDataError instead of overwriting each other); ETags are built from it.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __table_args__ = (
+        # Lets `email LIKE 'prefix%'` use an index regardless of the database collation.
+        Index("ix_users_email_pattern", "email", postgresql_ops={"email": "varchar_pattern_ops"}),
+        # Emails are unique case-insensitively; lookups compare lower(email) to use it.
+        Index("ix_users_email_lower", func.lower(email), unique=True),
+    )
+    __mapper_args__ = {"version_id_col": version}
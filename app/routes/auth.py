@@ -1,7 +1,13 @@
-from fastapi import APIRouter, HTTPException, status
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.core.config import settings
-from app.services.user_service import create_user, get_user_by_email
+from app.core.rate_limit import rate_limit
+from app.core.resilience import ServiceUnavailable
+from app.core.responses import auth_response
+from app.db.supabase import call_supabase_auth_sync
+from app.services.user_service import get_user_by_email, provision_user
 from app.core.dependencies import DBSession, SupabaseClient
 from app.schemas.users import (
     AuthResponse,
@@ -11,7 +17,6 @@ from app.schemas.users import (
     PasswordResetRequest,
     ResendVerificationInput,
     UserCreate,
-    UserPublic,
     UserRegister,
     VerifyEmailInput,
 )
@@ -22,15 +27,20 @@ router = APIRouter(
 )
 
 
-@router.post("/signup", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/signup",
+    response_model=AuthResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("signup"))],
+)
 def signup(
     payload: UserRegister,
     db: DBSession,
     supabase: SupabaseClient,
 ):
-    # Check for existing user in local DB
-    existing = get_user_by_email(session=db, email=payload.email)
-    if existing:
+    # Indexed (lower(email)) check first, so a repeat signup costs neither a
+    # Supabase call nor a password hash
+    if get_user_by_email(session=db, email=payload.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this email already exists",
@@ -38,13 +48,17 @@ def signup(
 
     # Create user in Supabase Auth
     try:
-        auth_resp = supabase.auth.sign_up(
+        auth_resp = call_supabase_auth_sync(
+            "sign_up",
+            supabase.auth.sign_up,
             {
                 "email": payload.email,
                 "password": payload.password,
                 "options": {"data": {"full_name": payload.full_name}},
-            }
+            },
         )
+    except ServiceUnavailable:
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -53,8 +67,9 @@ def signup(
 
     supabase_user_id = getattr(auth_resp.user, "id", None) if auth_resp else None
 
-    # Create local DB record (store hashed password)
-    db_user = create_user(
+    # Create local DB record (store hashed password); a concurrent signup for
+    # the same email, in any case, is detected by the same INSERT
+    db_user, created = provision_user(
         session=db,
         user_create=UserCreate(
             email=payload.email,
@@ -63,6 +78,11 @@ def signup(
         ),
         user_id=supabase_user_id,
     )
+    if not created:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists",
+        )
 
     # If email confirmation is required, Supabase returns session=None
     if not auth_resp or not auth_resp.session:
@@ -71,23 +91,29 @@ def signup(
             detail="Signup successful. Please verify your email before logging in.",
         )
 
-    access_token = auth_resp.session.access_token
-    return AuthResponse(
-        access_token=access_token,
-        user=UserPublic.model_validate(db_user),
+    return auth_response(
+        auth_resp.session.access_token, db_user, status_code=status.HTTP_201_CREATED
     )
 
 
-@router.post("/login", response_model=AuthResponse)
+@router.post(
+    "/login",
+    response_model=AuthResponse,
+    dependencies=[Depends(rate_limit("login"))],
+)
 def login(
     credentials: LoginInput,
     db: DBSession,
     supabase: SupabaseClient,
 ):
     try:
-        auth_resp = supabase.auth.sign_in_with_password(
-            {"email": credentials.email, "password": credentials.password}
+        auth_resp = call_supabase_auth_sync(
+            "sign_in_with_password",
+            supabase.auth.sign_in_with_password,
+            {"email": credentials.email, "password": credentials.password},
         )
+    except ServiceUnavailable:
+        raise
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -103,7 +129,7 @@ def login(
     # Ensure local DB user exists (create on first login)
     user = get_user_by_email(session=db, email=credentials.email)
     if not user:
-        user = create_user(
+        user, _ = provision_user(
             session=db,
             user_create=UserCreate(
                 email=credentials.email,
@@ -117,10 +143,7 @@ def login(
             user_id=getattr(auth_resp.user, "id", None) if auth_resp else None,
         )
 
-    return AuthResponse(
-        access_token=auth_resp.session.access_token,
-        user=UserPublic.model_validate(user),
-    )
+    return auth_response(auth_resp.session.access_token, user)
 
 
 @router.post("/verify-email", response_model=AuthResponse)
@@ -130,9 +153,13 @@ def verify_email(
     supabase: SupabaseClient,
 ):
     try:
-        auth_resp = supabase.auth.verify_otp(
-            {"email": payload.email, "token": payload.token, "type": payload.type}
+        auth_resp = call_supabase_auth_sync(
+            "verify_otp",
+            supabase.auth.verify_otp,
+            {"email": payload.email, "token": payload.token, "type": payload.type},
         )
+    except ServiceUnavailable:
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -146,11 +173,11 @@ def verify_email(
 
     user = get_user_by_email(session=db, email=payload.email)
     if not user:
-        user = create_user(
+        user, _ = provision_user(
             session=db,
             user_create=UserCreate(
                 email=payload.email,
-                password=payload.token,  # placeholder; Supabase password already set
+                password=secrets.token_urlsafe(32),  # unusable placeholder; Supabase holds the password
                 full_name=getattr(auth_resp.user, "user_metadata", {}).get(
                     "full_name", None
                 )
@@ -160,19 +187,24 @@ def verify_email(
             user_id=getattr(auth_resp.user, "id", None) if auth_resp else None,
         )
 
-    return AuthResponse(
-        access_token=auth_resp.session.access_token,
-        user=UserPublic.model_validate(user),
-    )
+    return auth_response(auth_resp.session.access_token, user)
 
 
-@router.post("/resend-verification", response_model=Message)
+@router.post(
+    "/resend-verification",
+    response_model=Message,
+    dependencies=[Depends(rate_limit("resend_verification"))],
+)
 def resend_verification(
     payload: ResendVerificationInput,
     supabase: SupabaseClient,
 ):
     try:
-        supabase.auth.resend({"email": payload.email, "type": payload.type})
+        call_supabase_auth_sync(
+            "resend", supabase.auth.resend, {"email": payload.email, "type": payload.type}
+        )
+    except ServiceUnavailable:
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -181,13 +213,21 @@ def resend_verification(
     return Message(message="Verification email sent if the account exists.")
 
 
-@router.post("/reset-password", response_model=Message)
+@router.post(
+    "/reset-password",
+    response_model=Message,
+    dependencies=[Depends(rate_limit("reset_password"))],
+)
 def reset_password_request(
     payload: PasswordResetRequest,
     supabase: SupabaseClient,
 ):
     try:
-        supabase.auth.reset_password_email(payload.email)
+        call_supabase_auth_sync(
+            "reset_password_email", supabase.auth.reset_password_email, payload.email
+        )
+    except ServiceUnavailable:
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -202,11 +242,16 @@ def reset_password_confirm(
     supabase: SupabaseClient,
 ):
     try:
-        # Supabase expects the reset token sent in the email link
-        supabase.auth.update_user(
+        # The token is the access token from the recovery link; the shared
+        # client keeps no session, so the update is made as that token's user.
+        call_supabase_auth_sync(
+            "update_user",
+            supabase.auth.update_user_with_token,
+            payload.token,
             {"password": payload.new_password},
-            access_token=payload.token,
         )
+    except ServiceUnavailable:
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -0,0 +1,285 @@
+"""Event-loop variant of app/routes/auth.py (selected with AUTH_ROUTES_MODE="async")."""
+
+import secrets
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.rate_limit import rate_limit
+from app.core.resilience import ServiceUnavailable
+from app.core.responses import auth_response
+from app.db.supabase import call_supabase_auth
+from app.services.async_user_service import get_user_by_email, provision_user
+from app.services.provisioning import user_provisioner
+from app.core.dependencies import AsyncReadDBSession, AsyncSupabaseClient
+from app.models.users import User
+from app.schemas.users import (
+    AuthResponse,
+    LoginInput,
+    Message,
+    NewPassword,
+    PasswordResetRequest,
+    ResendVerificationInput,
+    UserCreate,
+    UserRegister,
+    VerifyEmailInput,
+)
+
+router = APIRouter(
+    prefix=f"{settings.API_V1_STR}/auth",
+    tags=["auth"],
+)
+
+
+def _full_name(auth_resp) -> str | None:
+    if auth_resp and auth_resp.user and auth_resp.user.user_metadata:
+        return auth_resp.user.user_metadata.get("full_name")
+    return None
+
+
+async def _ensure_local_user(
+    db: AsyncSession,
+    *,
+    user_create: UserCreate,
+    user_id: uuid.UUID | str | None,
+) -> User:
+    """Return the local user, creating it (inline or write-behind) on first sight."""
+    if settings.USER_PROVISIONING_WRITE_BEHIND:
+        pending = user_provisioner.get_pending_by_email(user_create.email)
+        if pending is not None:
+            return pending
+
+    user = await get_user_by_email(session=db, email=user_create.email)
+    if user:
+        return user
+
+    if settings.USER_PROVISIONING_WRITE_BEHIND:
+        return user_provisioner.enqueue(user_create=user_create, user_id=user_id)
+    user, _ = await provision_user(session=db, user_create=user_create, user_id=user_id)
+    return user
+
+
+@router.post(
+    "/signup",
+    response_model=AuthResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("signup"))],
+)
+async def signup(
+    payload: UserRegister,
+    db: AsyncReadDBSession,
+    supabase: AsyncSupabaseClient,
+):
+    # Users still in the write-behind buffer aren't in the table yet. Both
+    # checks come before Supabase, so a repeat signup costs neither a Supabase
+    # call nor a password hash.
+    if user_provisioner.get_pending_by_email(payload.email) or await get_user_by_email(
+        session=db, email=payload.email
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists",
+        )
+
+    # Create user in Supabase Auth
+    try:
+        auth_resp = await call_supabase_auth(
+            "sign_up",
+            supabase.auth.sign_up,
+            {
+                "email": payload.email,
+                "password": payload.password,
+                "options": {"data": {"full_name": payload.full_name}},
+            },
+        )
+    except ServiceUnavailable:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Supabase signup failed: {exc}",
+        )
+
+    supabase_user_id = getattr(auth_resp.user, "id", None) if auth_resp else None
+
+    # Create local DB record (store hashed password); a concurrent signup for
+    # the same email, in any case, is detected by the same INSERT
+    db_user, created = await provision_user(
+        session=db,
+        user_create=UserCreate(
+            email=payload.email,
+            password=payload.password,
+            full_name=payload.full_name,
+        ),
+        user_id=supabase_user_id,
+    )
+    if not created:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists",
+        )
+
+    # If email confirmation is required, Supabase returns session=None
+    if not auth_resp or not auth_resp.session:
+        raise HTTPException(
+            status_code=status.HTTP_202_ACCEPTED,
+            detail="Signup successful. Please verify your email before logging in.",
+        )
+
+    return auth_response(
+        auth_resp.session.access_token, db_user, status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.post(
+    "/login",
+    response_model=AuthResponse,
+    dependencies=[Depends(rate_limit("login"))],
+)
+async def login(
+    credentials: LoginInput,
+    db: AsyncReadDBSession,
+    supabase: AsyncSupabaseClient,
+):
+    try:
+        auth_resp = await call_supabase_auth(
+            "sign_in_with_password",
+            supabase.auth.sign_in_with_password,
+            {"email": credentials.email, "password": credentials.password},
+        )
+    except ServiceUnavailable:
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+
+    if not auth_resp or not auth_resp.session:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unable to retrieve access token",
+        )
+
+    # Ensure local DB user exists (create on first login)
+    user = await _ensure_local_user(
+        db,
+        user_create=UserCreate(
+            email=credentials.email,
+            password=credentials.password,
+            full_name=_full_name(auth_resp),
+        ),
+        user_id=getattr(auth_resp.user, "id", None),
+    )
+
+    return auth_response(auth_resp.session.access_token, user)
+
+
+@router.post("/verify-email", response_model=AuthResponse)
+async def verify_email(
+    payload: VerifyEmailInput,
+    db: AsyncReadDBSession,
+    supabase: AsyncSupabaseClient,
+):
+    try:
+        auth_resp = await call_supabase_auth(
+            "verify_otp",
+            supabase.auth.verify_otp,
+            {"email": payload.email, "token": payload.token, "type": payload.type},
+        )
+    except ServiceUnavailable:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Email verification failed: {exc}",
+        )
+    if not auth_resp or not auth_resp.session:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unable to retrieve access token after verification",
+        )
+
+    user = await _ensure_local_user(
+        db,
+        user_create=UserCreate(
+            email=payload.email,
+            password=secrets.token_urlsafe(32),  # unusable placeholder; Supabase holds the password
+            full_name=_full_name(auth_resp),
+        ),
+        user_id=getattr(auth_resp.user, "id", None),
+    )
+
+    return auth_response(auth_resp.session.access_token, user)
+
+
+@router.post(
+    "/resend-verification",
+    response_model=Message,
+    dependencies=[Depends(rate_limit("resend_verification"))],
+)
+async def resend_verification(
+    payload: ResendVerificationInput,
+    supabase: AsyncSupabaseClient,
+):
+    try:
+        await call_supabase_auth(
+            "resend", supabase.auth.resend, {"email": payload.email, "type": payload.type}
+        )
+    except ServiceUnavailable:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Resend verification failed: {exc}",
+        )
+    return Message(message="Verification email sent if the account exists.")
+
+
+@router.post(
+    "/reset-password",
+    response_model=Message,
+    dependencies=[Depends(rate_limit("reset_password"))],
+)
+async def reset_password_request(
+    payload: PasswordResetRequest,
+    supabase: AsyncSupabaseClient,
+):
+    try:
+        await call_supabase_auth(
+            "reset_password_email", supabase.auth.reset_password_email, payload.email
+        )
+    except ServiceUnavailable:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Password reset request failed: {exc}",
+        )
+    return Message(message="If the email exists, a reset link has been sent.")
+
+
+@router.post("/reset-password/confirm", response_model=Message)
+async def reset_password_confirm(
+    payload: NewPassword,
+    supabase: AsyncSupabaseClient,
+):
+    try:
+        # The token is the access token from the recovery link; the shared
+        # client keeps no session, so the update is made as that token's user.
+        await call_supabase_auth(
+            "update_user",
+            supabase.auth.update_user_with_token,
+            payload.token,
+            {"password": payload.new_password},
+        )
+    except ServiceUnavailable:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Password reset confirmation failed: {exc}",
+        )
+    return Message(message="Password updated successfully.")
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.core.config import settings
+from app.core.dependencies import AsyncDBSession
+from app.core.rate_limit import rate_limit
+from app.core.responses import token_pair_response
+from app.schemas.users import LocalAuthResponse, LoginInput, Message, RefreshTokenInput, TokenPair
+from app.services import local_auth
+
+router = APIRouter(
+    prefix=f"{settings.API_V1_STR}/auth/local",
+    tags=["auth"],
+)
+
+
+@router.post(
+    "/token",
+    response_model=LocalAuthResponse,
+    dependencies=[Depends(rate_limit("local_token"))],
+)
+async def token(credentials: LoginInput, db: AsyncDBSession):
+    """Log in against the local users table; no Supabase call"""
+    result = await local_auth.login(
+        session=db, email=credentials.email, password=credentials.password
+    )
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+    user, tokens = result
+    return token_pair_response(tokens, user)
+
+
+@router.post(
+    "/refresh",
+    response_model=TokenPair,
+    dependencies=[Depends(rate_limit("local_refresh"))],
+)
+async def refresh(payload: RefreshTokenInput, db: AsyncDBSession):
+    """Exchange a refresh token for a new access/refresh pair (the old one stops working)"""
+    try:
+        tokens = await local_auth.refresh(session=db, refresh_token=payload.refresh_token)
+    except local_auth.InvalidRefreshToken:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    return token_pair_response(tokens)
+
+
+@router.post("/logout", response_model=Message)
+async def logout(payload: RefreshTokenInput, db: AsyncDBSession):
+    """Revoke a refresh token and the rest of its login"""
+    await local_auth.logout(session=db, refresh_token=payload.refresh_token)
+    return {"message": "Logged out"}
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Response
+
+from app.core.config import settings
+from app.core.dependencies import CurrentSuperuser
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+from app.db.pool_metrics import pool_stats
+
+router = APIRouter(
+    prefix=f"{settings.API_V1_STR}/internal",
+    tags=["internal"],
+)
+
+# Served at the root so Prometheus can scrape it with its default path.
+metrics_router = APIRouter(include_in_schema=False)
+
+
+@router.get("/db-pool")
+async def db_pool_stats(current_user: CurrentSuperuser):
+    """Live connection pool state for every engine this worker has built"""
+    return pool_stats()
+
+
+@metrics_router.get("/metrics")
+async def metrics():
+    """Prometheus text exposition for this worker process"""
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
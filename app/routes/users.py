@@ -1,6 +1,25 @@
-from fastapi import APIRouter
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
 from app.core.config import settings
-from app.core.dependencies import CurrentUser, CurrentUserAsync, DBSession
+from app.core.dependencies import (
+    AsyncReadDBSession,
+    CurrentSuperuser,
+    CurrentUser,
+    CurrentUserId,
+    get_user_or_404,
+)
+from app.core.responses import (
+    etag_matches,
+    not_modified_response,
+    user_conditional_response,
+    user_etag,
+    users_public_response,
+)
+from app.schemas.users import UserPublic, UsersPublic
+from app.services.async_user_service import count_users, get_user_version, list_users, user_filters
+from app.services.user_bulk import MEDIA_TYPES, ExportFormat, export_users
 
 router = APIRouter(
     prefix=f"{settings.API_V1_STR}/users",
@@ -8,23 +27,83 @@ router = APIRouter(
 )
 
 
-@router.get("/me")
-async def read_users_me(current_user: CurrentUser):
-    """Synchronous route with auth"""
-    return current_user
+@router.get("", response_model=UsersPublic)
+async def read_users(
+    current_user: CurrentSuperuser,
+    db: AsyncReadDBSession,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    order_by: Literal["id", "email"] = "id",
+    cursor: Annotated[str | None, Query(description="next_cursor from the previous page")] = None,
+    is_active: bool | None = None,
+    is_superuser: bool | None = None,
+    email_prefix: Annotated[str | None, Query(min_length=1, max_length=255)] = None,
+    exact_count: Annotated[
+        bool, Query(description="COUNT(*) instead of the planner estimate")
+    ] = False,
+):
+    """List users (superuser only), keyset-paginated"""
+    filters = user_filters(
+        is_active=is_active, is_superuser=is_superuser, email_prefix=email_prefix
+    )
+    try:
+        users, next_cursor = await list_users(
+            session=db, filters=filters, order_by=order_by, after=cursor, limit=limit
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    count = await count_users(session=db, filters=filters, exact=exact_count)
+    return users_public_response(users, count, next_cursor)
+
+
+@router.get("/export")
+async def export_users_stream(
+    current_user: CurrentSuperuser,
+    fmt: Annotated[ExportFormat, Query(alias="format")] = "ndjson",
+):
+    """Stream every user as NDJSON or CSV (superuser only; password hashes excluded)"""
+    return StreamingResponse(
+        export_users(fmt=fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="users.{fmt}"'},
+    )
+
 
+IfNoneMatch = Annotated[str | None, Header()]
+_NOT_MODIFIED = {304: {"description": "The ETag in If-None-Match is current"}}
 
-@router.get("/me/async")
-async def read_users_me_async(current_user: CurrentUserAsync):
-    """Fully async route with auth"""
-    return current_user
+
+async def _current_user_response(
+    user_id: str, db: AsyncReadDBSession, if_none_match: str | None
+) -> Response:
+    # Compare versions first: on a user-cache hit a poll costs no query at all.
+    if if_none_match:
+        version = await get_user_version(session=db, user_id=user_id)
+        if version is not None and etag_matches(if_none_match, user_etag(user_id, version)):
+            return not_modified_response(user_etag(user_id, version))
+    return user_conditional_response(await get_user_or_404(db, user_id))
+
+
+@router.get("/me", response_model=UserPublic, responses=_NOT_MODIFIED)
+async def read_users_me(
+    user_id: CurrentUserId, db: AsyncReadDBSession, if_none_match: IfNoneMatch = None
+):
+    """Synchronous route with auth (ETag / If-None-Match aware)"""
+    return await _current_user_response(user_id, db, if_none_match)
+
+
+@router.get("/me/async", response_model=UserPublic, responses=_NOT_MODIFIED)
+async def read_users_me_async(
+    user_id: CurrentUserId, db: AsyncReadDBSession, if_none_match: IfNoneMatch = None
+):
+    """Fully async route with auth (ETag / If-None-Match aware)"""
+    return await _current_user_response(user_id, db, if_none_match)
 
 
 @router.get("/protected")
 async def protected_route(
     current_user: CurrentUser,
-    db: DBSession,
+    db: AsyncReadDBSession,
 ):
     """Example protected route with database access"""
     # Use db for queries
-    return {"message": "Protected data", "user": current_user.email}
\ No newline at end of file
+    return {"message": "Protected data", "user": current_user.email}
@@ -30,6 +30,7 @@ class UserPublic(UserBase):
 class UsersPublic(BaseModel):
     data: List[UserPublic]
     count: int
+    next_cursor: Optional[str] = None
 
 # --- Auth & Utility Schemas ---
 class LoginInput(BaseModel):
@@ -65,4 +66,16 @@ class ResendVerificationInput(BaseModel):
 class AuthResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
-    user: UserPublic
\ No newline at end of file
+    user: UserPublic
+
+class RefreshTokenInput(BaseModel):
+    refresh_token: str
+
+class TokenPair(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+class LocalAuthResponse(TokenPair):
+    user: UserPublic
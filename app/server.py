@@ -0,0 +1,219 @@
+"""
+Production server behind `python -m app serve`.
+
+The supervisor binds the socket and imports the app once, then forks the
+workers, which share both. Each worker runs uvicorn on uvloop and httptools
+when they are installed (asyncio and h11 otherwise). Before forking, the
+supervisor divides DB_CONNECTION_BUDGET among the workers, and within each
+worker among the pooled engines it opens to the primary (the async engine,
+plus the sync one for AUTH_ROUTES_MODE=sync) and the user cache's LISTEN
+connection. Each pool's size plus overflow is capped at its share, so the
+workers together stay within the budget. The password hashing pool is
+divided too, unless PASSWORD_HASH_WORKERS is set.
+
+On SIGTERM or SIGINT every worker stops accepting connections and waits up to
+SERVER_GRACEFUL_TIMEOUT_SECONDS for in-flight requests. Its lifespan then
+flushes buffered users, disposes the engines and closes the Supabase
+clients. Workers that die unexpectedly are replaced, unless they die during
+startup.
+"""
+
+import logging
+import os
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from importlib.util import find_spec
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.logging import configure_logging, stop_logging
+
+logger = logging.getLogger(__name__)
+
+# A worker that exits sooner than this never finished starting; don't respawn it.
+_STARTUP_GRACE_SECONDS = 10.0
+# Time for the lifespan shutdown (flush, dispose) on top of the request drain.
+_SHUTDOWN_MARGIN_SECONDS = 10.0
+
+
+def cpu_count() -> int:
+    """CPUs this process may run on (respects affinity / cpusets)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+@dataclass(frozen=True)
+class WorkerBudget:
+    workers: int
+    overrides: dict[str, int]
+
+
+def _primary_connections() -> tuple[int, int]:
+    """(pooled engines, dedicated connections) a worker opens to the primary."""
+    engines = 2 if settings.AUTH_ROUTES_MODE == "sync" else 1
+    dedicated = 1 if settings.USER_CACHE_INVALIDATION == "postgres" else 0
+    return engines, dedicated
+
+
+def plan_workers(workers: int | None = None) -> WorkerBudget:
+    """Worker count, and the per-worker settings that keep the total within budget."""
+    workers = workers or settings.SERVER_WORKERS or cpu_count()
+    overrides: dict[str, int] = {}
+    if settings.DB_CONNECTION_BUDGET > 0:
+        engines, dedicated = _primary_connections()
+        per_engine = (settings.DB_CONNECTION_BUDGET // workers - dedicated) // engines
+        if per_engine < 1:
+            raise SystemExit(
+                f"DB_CONNECTION_BUDGET={settings.DB_CONNECTION_BUDGET} is less than one "
+                f"connection for each of {engines} engine(s) in {workers} workers"
+            )
+        # Only one of the two pool sizes is in effect (see _engine_options); 0
+        # (NullPool) would be unbounded, so it gets the whole share as a pool.
+        key = "DB_POOLER_POOL_SIZE" if settings.DB_POOLER_MODE == "transaction" else "DB_POOL_SIZE"
+        configured = getattr(settings, key)
+        pool_size = min(configured, per_engine) if configured > 0 else per_engine
+        overrides[key] = pool_size
+        overrides["DB_MAX_OVERFLOW"] = per_engine - pool_size
+    if "PASSWORD_HASH_WORKERS" not in settings.model_fields_set:
+        overrides["PASSWORD_HASH_WORKERS"] = max(1, cpu_count() // workers)
+    return WorkerBudget(workers, overrides)
+
+
+def _config(host: str, port: int) -> uvicorn.Config:
+    return uvicorn.Config(
+        "app.main:app",
+        host=host,
+        port=port,
+        loop="uvloop" if find_spec("uvloop") else "asyncio",
+        http="httptools" if find_spec("httptools") else "h11",
+        lifespan="on",
+        # app.core.logging takes over in the lifespan; uvicorn's dictConfig would
+        # only install synchronous handlers first.
+        log_config=None,
+        timeout_graceful_shutdown=int(settings.SERVER_GRACEFUL_TIMEOUT_SECONDS),
+    )
+
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket) -> None:
+    # uvicorn installs its own SIGTERM/SIGINT handlers once serving.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks the workers, replaces crashed ones and forwards shutdown signals."""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int) -> None:
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.children: dict[int, float] = {}  # pid -> started at
+        self.stopping = False
+        self.exit_code = 0
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # Own process group: a terminal's Ctrl-C reaches only the supervisor,
+            # which forwards one SIGTERM (a second signal makes uvicorn skip the drain).
+            os.setpgid(0, 0)
+            code = 0
+            try:
+                _run_worker(self.config, self.sock)
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+
+    def _stop(self, signum: int, frame) -> None:
+        if not self.stopping:
+            logger.info("Received %s, draining %d workers", signal.Signals(signum).name, len(self.children))
+        self.stopping = True
+
+    def _reap(self) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if time.monotonic() - started < _STARTUP_GRACE_SECONDS:
+                logger.error("Worker %d exited with %d during startup; shutting down", pid, code)
+                self.exit_code = 1
+                self.stopping = True
+            else:
+                logger.warning("Worker %d exited with %d; starting a replacement", pid, code)
+                self.spawn()
+
+    def _terminate(self) -> None:
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + settings.SERVER_GRACEFUL_TIMEOUT_SECONDS + _SHUTDOWN_MARGIN_SECONDS
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in self.children:
+            logger.error("Worker %d did not stop in time; killing it", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.children.clear()
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self.spawn()
+        while not self.stopping:
+            self._reap()
+            time.sleep(0.5)
+        self._terminate()
+        return self.exit_code
+
+
+def serve(*, host: str | None = None, port: int | None = None, workers: int | None = None) -> int:
+    budget = plan_workers(workers)
+    for key, value in budget.overrides.items():
+        setattr(settings, key, value)
+
+    config = _config(host or settings.SERVER_HOST, port or settings.SERVER_PORT)
+    # Preload: import errors surface once, here, and workers share the imported code.
+    config.load()
+    sock = config.bind_socket()
+
+    configure_logging()
+    logger.info(
+        "Serving on %s:%d with %d workers (%s, %s) %s",
+        config.host,
+        config.port,
+        budget.workers,
+        config.loop,
+        config.http,
+        budget.overrides,
+    )
+    try:
+        if budget.workers == 1:
+            stop_logging()  # the worker's lifespan configures it again
+            _run_worker(config, sock)
+            return 0
+        return Supervisor(config, sock, budget.workers).run()
+    finally:
+        sock.close()
+        stop_logging()
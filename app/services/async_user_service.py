@@ -0,0 +1,253 @@
+import base64
+import json
+import logging
+import uuid
+from typing import Any, Literal
+
+from sqlalchemy import ColumnElement, Executable, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement
+
+from app.core.security import (
+    PasswordHashingBusy,
+    hash_password_async,
+    password_needs_rehash,
+    verify_password_async,
+)
+from app.db.replicas import use_primary
+from app.models.users import User
+from app.schemas.users import UserCreate, UserUpdate
+from app.services.user_cache import user_cache
+from app.services.user_service import (
+    applied_rehash,
+    email_matches,
+    provision_statement,
+    rehash_statement,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def create_user(
+    *,
+    session: AsyncSession,
+    user_create: UserCreate,
+    user_id: uuid.UUID | None = None,
+) -> User:
+    """Create a user with hashed password."""
+
+    user_data = user_create.model_dump(exclude={"password"})
+
+    if user_id is not None:
+        user_data["id"] = user_id
+
+    db_obj = User(
+        **user_data,
+        hashed_password=await hash_password_async(user_create.password),
+    )
+
+    session.add(db_obj)
+    await session.commit()
+    await session.refresh(db_obj)
+    user_cache.write_through(db_obj)
+    return db_obj
+
+
+async def provision_user(
+    *,
+    session: AsyncSession,
+    user_create: UserCreate,
+    user_id: uuid.UUID | str | None = None,
+) -> tuple[User, bool]:
+    """
+    Insert the user unless the email (ignoring case) exists, in one round trip.
+    Returns (user, created); an existing user is returned unchanged.
+    """
+
+    user_data = user_create.model_dump(exclude={"password"})
+    user_data["id"] = uuid.UUID(str(user_id)) if user_id else uuid.uuid4()
+    user_data["hashed_password"] = await hash_password_async(user_create.password)
+
+    db_obj, created = (await session.execute(provision_statement(user_data))).one()
+    await session.commit()
+    if created:
+        user_cache.write_through(db_obj)
+    return db_obj, created
+
+
+async def update_user(*, session: AsyncSession, db_user: User, user_in: UserUpdate) -> Any:
+    """Update user fields, hashing password when provided."""
+
+    user_data = user_in.model_dump(exclude_unset=True)
+
+    if "password" in user_data:
+        password = user_data.pop("password")
+        db_user.hashed_password = await hash_password_async(password)
+
+    for field, value in user_data.items():
+        setattr(db_user, field, value)
+
+    session.add(db_user)
+    await session.commit()
+    await session.refresh(db_user)
+    user_cache.write_through(db_user)
+    return db_user
+
+
+async def get_user_by_email(*, session: AsyncSession, email: str) -> User | None:
+    """On a replica-routed session a miss is re-checked on the primary before it counts."""
+    statement = select(User).where(email_matches(email))
+    user = (await session.scalars(statement)).first()
+    if user is None and use_primary(session):
+        user = (await session.scalars(statement)).first()
+    return user
+
+
+async def get_user_version(*, session: AsyncSession, user_id: uuid.UUID | str) -> int | None:
+    """Row version for conditional requests: from the user cache, else one column."""
+    version = user_cache.get_version(user_id)
+    if version is None:
+        version = await session.scalar(select(User.version).where(User.id == user_id))
+    return version
+
+
+async def authenticate(
+    *, session: AsyncSession, email: str, password: str, local_credentials: bool = False
+) -> User | None:
+    """
+    Check the password, re-hashing it if the scheme or cost has changed. With
+    local_credentials, users whose hash is only a copy from Supabase signup fail
+    without a verify.
+    """
+    db_user = await get_user_by_email(session=session, email=email)
+    if not db_user or (local_credentials and not db_user.local_credentials):
+        return None
+    if not await verify_password_async(password, db_user.hashed_password):
+        return None
+    if password_needs_rehash(db_user.hashed_password):
+        try:
+            hashed = await hash_password_async(password)
+            result = await session.execute(rehash_statement(db_user, hashed))
+            await session.commit()
+            applied_rehash(db_user, hashed, result.rowcount)
+        except PasswordHashingBusy:
+            # The login itself succeeded; upgrade the hash on a later one.
+            logger.info("Skipped rehashing password for user %s: hashing pool busy", db_user.id)
+    return db_user
+
+
+# ===== Listing =====
+UserSortKey = Literal["id", "email"]
+
+
+def encode_user_cursor(order_by: UserSortKey, user: User) -> str:
+    key = [str(user.id)] if order_by == "id" else [user.email, str(user.id)]
+    raw = json.dumps([order_by, key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_user_cursor(order_by: UserSortKey, cursor: str) -> list[Any]:
+    """Raises ValueError for malformed cursors or cursors from another sort order."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort, key = json.loads(base64.urlsafe_b64decode(padded))
+        if sort != order_by:
+            raise ValueError("cursor belongs to a different order_by")
+        if order_by == "id":
+            (user_id,) = key
+            return [uuid.UUID(user_id)]
+        email, user_id = key
+        return [str(email), uuid.UUID(user_id)]
+    except (TypeError, ValueError, json.JSONDecodeError) as exc:
+        raise ValueError(f"Invalid cursor: {exc}") from exc
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def user_filters(
+    *,
+    is_active: bool | None = None,
+    is_superuser: bool | None = None,
+    email_prefix: str | None = None,
+) -> list[ColumnElement[bool]]:
+    filters = []
+    if is_active is not None:
+        filters.append(User.is_active == is_active)
+    if is_superuser is not None:
+        filters.append(User.is_superuser == is_superuser)
+    if email_prefix:
+        # A plain `LIKE 'prefix%'` can use the varchar_pattern_ops index.
+        filters.append(User.email.like(_escape_like(email_prefix) + "%"))
+    return filters
+
+
+async def list_users(
+    *,
+    session: AsyncSession,
+    filters: list[ColumnElement[bool]],
+    order_by: UserSortKey = "id",
+    after: str | None = None,
+    limit: int = 50,
+) -> tuple[list[User], str | None]:
+    """
+    One page of users in keyset order, seeking past the `after` cursor instead of
+    using OFFSET. Returns the page and the cursor for the next one (None at the end).
+    """
+    sort_columns = [User.id] if order_by == "id" else [User.email, User.id]
+    statement = select(User).where(*filters).order_by(*sort_columns).limit(limit + 1)
+    if after is not None:
+        statement = statement.where(tuple_(*sort_columns) > tuple_(*decode_user_cursor(order_by, after)))
+
+    users = list((await session.scalars(statement)).all())
+    if len(users) <= limit:
+        return users, None
+    users = users[:limit]
+    return users, encode_user_cursor(order_by, users[-1])
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <statement>, keeping the statement's bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Executable) -> None:
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def count_users(
+    *,
+    session: AsyncSession,
+    filters: list[ColumnElement[bool]],
+    exact: bool = False,
+) -> int:
+    """
+    Exact COUNT(*) only on request. Otherwise pg_class.reltuples for the whole
+    table, or the planner's row estimate when filters apply.
+    """
+    if exact:
+        return await session.scalar(select(func.count()).select_from(User).where(*filters))
+
+    if not filters:
+        reltuples = await session.scalar(
+            text(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"
+            ).execution_options(read_only=True),
+            {"table": User.__tablename__},
+        )
+        # -1 means the table has never been vacuumed or analyzed.
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+
+    explain = _Explain(select(User.id).where(*filters)).execution_options(read_only=True)
+    plan = (await session.execute(explain)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
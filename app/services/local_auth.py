@@ -0,0 +1,202 @@
+"""
+Local auth backend: password login against users.hashed_password, short-lived
+HS256 access tokens (app.core.security) and rotating refresh tokens.
+
+Login is one indexed lookup by email, one bcrypt verify on the hashing pool
+and one INSERT for the refresh token. Refresh tokens are opaque random
+strings; only their SHA-256 is stored. Each refresh revokes the presented
+token and issues a new one in the same family. If a revoked token is
+presented again it has probably leaked, so the whole family is revoked and
+that login has to start over.
+
+Only users marked local_credentials (set by `python -m app import-users
+--local-credentials`) can log in here. Other rows were provisioned by the
+Supabase routes, whose hashed_password is written before the email is
+verified and not kept in sync with Supabase password resets.
+
+Every login and refresh adds a row. Expired rows are deleted in batches
+every LOCAL_REFRESH_TOKEN_PURGE_INTERVAL_SECONDS (and by `python -m app
+purge-refresh-tokens`). Revoked rows are kept until they expire, so reuse
+of a rotated token is still detected.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.session import AsyncSessionLocal
+from app.models.refresh_tokens import RefreshToken
+from app.models.users import User
+from app.schemas.users import TokenPair
+from app.services.async_user_service import authenticate
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidRefreshToken(Exception):
+    """Unknown, expired, revoked or reused refresh token."""
+
+
+def _hash(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+async def _issue(session: AsyncSession, user_id: uuid.UUID, family_id: uuid.UUID) -> TokenPair:
+    refresh_token = secrets.token_urlsafe(32)
+    session.add(
+        RefreshToken(
+            token_hash=_hash(refresh_token),
+            user_id=user_id,
+            family_id=family_id,
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(days=settings.LOCAL_REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    await session.commit()
+    expires_in = settings.LOCAL_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    return TokenPair.model_construct(
+        access_token=create_access_token(user_id, timedelta(seconds=expires_in)),
+        refresh_token=refresh_token,
+        token_type="bearer",
+        expires_in=expires_in,
+    )
+
+
+async def login(
+    *, session: AsyncSession, email: str, password: str
+) -> tuple[User, TokenPair] | None:
+    """Check the password and start a new token family; None on bad credentials or inactive users."""
+    user = await authenticate(session=session, email=email, password=password, local_credentials=True)
+    if user is None or not user.is_active:
+        return None
+    return user, await _issue(session, user.id, uuid.uuid4())
+
+
+async def _revoke_family(session: AsyncSession, family_id: uuid.UUID, now: datetime) -> None:
+    await session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+
+async def refresh(*, session: AsyncSession, refresh_token: str) -> TokenPair:
+    """Rotate a refresh token. Raises InvalidRefreshToken."""
+    token_hash = _hash(refresh_token)
+    now = datetime.now(timezone.utc)
+    # One statement, so of two concurrent refreshes with the same token only one wins.
+    rotated = (
+        await session.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > now,
+            )
+            .values(revoked_at=now)
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+            .execution_options(synchronize_session=False)
+        )
+    ).one_or_none()
+
+    if rotated is None:
+        stored = (
+            await session.execute(
+                select(RefreshToken.family_id, RefreshToken.revoked_at).where(
+                    RefreshToken.token_hash == token_hash
+                )
+            )
+        ).one_or_none()
+        if stored is not None and stored.revoked_at is not None:
+            await _revoke_family(session, stored.family_id, now)
+        raise InvalidRefreshToken()
+
+    user = (
+        await session.execute(
+            select(User.is_active, User.local_credentials).where(User.id == rotated.user_id)
+        )
+    ).one_or_none()
+    if user is None or not (user.is_active and user.local_credentials):
+        await _revoke_family(session, rotated.family_id, now)
+        raise InvalidRefreshToken()
+    return await _issue(session, rotated.user_id, rotated.family_id)
+
+
+async def logout(*, session: AsyncSession, refresh_token: str) -> None:
+    """Revoke the token and every other token rotated from the same login."""
+    family_id = await session.scalar(
+        select(RefreshToken.family_id).where(RefreshToken.token_hash == _hash(refresh_token))
+    )
+    if family_id is not None:
+        await _revoke_family(session, family_id, datetime.now(timezone.utc))
+
+
+# ===== Purging =====
+async def purge_expired_refresh_tokens(*, session: AsyncSession, batch_size: int = 10_000) -> int:
+    """Delete expired refresh tokens, batch_size rows per transaction; returns how many."""
+    now = datetime.now(timezone.utc)
+    purged = 0
+    while True:
+        expired = (
+            select(RefreshToken.token_hash)
+            .where(RefreshToken.expires_at < now)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.token_hash.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+
+
+class RefreshTokenPurger:
+    """Runs purge_expired_refresh_tokens every `interval` seconds in the background."""
+
+    def __init__(self, *, interval: float) -> None:
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        # Spread the workers out instead of having all of them purge at once.
+        await asyncio.sleep(random.uniform(0, self.interval))
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    purged = await purge_expired_refresh_tokens(session=session)
+                if purged:
+                    logger.info("Purged %d expired refresh tokens", purged)
+            except Exception:
+                logger.exception("Failed to purge expired refresh tokens")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+refresh_token_purger = RefreshTokenPurger(interval=settings.LOCAL_REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
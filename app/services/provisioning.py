@@ -0,0 +1,181 @@
+"""
+Write-behind provisioning of local user rows.
+
+Login and email verification only need the local row to exist eventually, so
+new users are buffered in memory and inserted in batches with a single
+INSERT ... ON CONFLICT DO NOTHING (by id or case-insensitive email). Buffered users are served from memory
+until their row is flushed.
+
+Passwords are hashed a few at a time, well inside PASSWORD_HASH_QUEUE_DEPTH,
+and each hash replaces its plaintext in the buffer as soon as it is done.
+When the hashing pool or the database is busy the flush is retried on the
+next tick. At most USER_PROVISIONING_MAX_PENDING users are buffered; beyond
+that enqueue raises ProvisioningBacklogFull (503).
+"""
+
+import asyncio
+import logging
+import uuid
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.security import PasswordHashingBusy, hash_password_async
+from app.db.session import AsyncSessionLocal
+from app.models.users import User
+from app.schemas.users import UserCreate
+
+logger = logging.getLogger(__name__)
+
+
+class ProvisioningBacklogFull(Exception):
+    """Raised when the write-behind buffer is full (mapped to 503)."""
+
+
+class UserProvisioner:
+    def __init__(self, *, batch_size: int, flush_interval: float, max_pending: int) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # user id -> (column values, plain password until values has its hash)
+        self._pending: dict[uuid.UUID, tuple[dict, str | None]] = {}
+        self._by_email: dict[str, uuid.UUID] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    # ===== Buffer =====
+    def enqueue(self, *, user_create: UserCreate, user_id: uuid.UUID | None = None) -> User:
+        """Buffer a new user and return a transient User built from it."""
+        existing = self.get_pending_by_email(user_create.email)
+        if existing is not None:
+            return existing
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+            raise ProvisioningBacklogFull()
+
+        values = user_create.model_dump(exclude={"password"})
+        values["id"] = uuid.UUID(str(user_id)) if user_id else uuid.uuid4()
+        self._pending[values["id"]] = (values, user_create.password)
+        self._by_email[values["email"].lower()] = values["id"]
+
+        self._ensure_running()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return User(**values)
+
+    def get_pending(self, user_id: uuid.UUID | str) -> User | None:
+        entry = self._pending.get(uuid.UUID(str(user_id)))
+        if entry is None:
+            return None
+        values = {key: value for key, value in entry[0].items() if key != "hashed_password"}
+        return User(**values)
+
+    def get_pending_by_email(self, email: str) -> User | None:
+        user_id = self._by_email.get(email.strip().lower())
+        return self.get_pending(user_id) if user_id else None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    # ===== Flushing =====
+    async def flush(self) -> bool:
+        """Insert everything currently buffered, batch_size rows per statement; False if some is left."""
+        async with self._flush_lock:
+            while self._pending:
+                batch = list(self._pending.items())[: self.batch_size]
+                try:
+                    await self._hash(batch)
+                    await self._insert(batch)
+                except PasswordHashingBusy:
+                    # Login traffic has the pool; the hashes done so far are kept.
+                    logger.warning("Password hashing busy; %d users still pending", len(self._pending))
+                    return False
+                except Exception:
+                    logger.exception("Failed to flush %d pending users; retrying", len(batch))
+                    return False
+                for user_id, (values, _) in batch:
+                    self._pending.pop(user_id, None)
+                    self._by_email.pop(values["email"].lower(), None)
+            return True
+
+    async def _hash(self, batch: list[tuple[uuid.UUID, tuple[dict, str | None]]]) -> None:
+        # Enough in flight to keep every worker busy, leaving the rest of
+        # PASSWORD_HASH_QUEUE_DEPTH to requests.
+        limit = asyncio.Semaphore(
+            max(1, min(settings.PASSWORD_HASH_WORKERS * 2, settings.PASSWORD_HASH_QUEUE_DEPTH // 2))
+        )
+
+        async def hash_one(user_id: uuid.UUID, values: dict, password: str) -> None:
+            async with limit:
+                values["hashed_password"] = await hash_password_async(password)
+            if user_id in self._pending:
+                self._pending[user_id] = (values, None)
+
+        await asyncio.gather(
+            *(
+                hash_one(user_id, values, password)
+                for user_id, (values, password) in batch
+                if password is not None
+            )
+        )
+
+    async def _insert(self, batch: list[tuple[uuid.UUID, tuple[dict, str | None]]]) -> None:
+        rows = [values for _, (values, _) in batch]
+        statement = insert(User).on_conflict_do_nothing()
+        async with AsyncSessionLocal() as session:
+            try:
+                await session.execute(statement, rows)
+                await session.commit()
+                return
+            except IntegrityError:
+                await session.rollback()
+
+            # A row violates something other than a unique key; isolate it.
+            for row in rows:
+                try:
+                    await session.execute(statement, [row])
+                    await session.commit()
+                except IntegrityError:
+                    await session.rollback()
+                    logger.warning("Dropping pending user %s: conflicting row", row["id"])
+
+    # ===== Lifecycle =====
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not await self.flush():
+                # Back off instead of retrying on every enqueue while busy.
+                await asyncio.sleep(self.flush_interval)
+
+    async def start(self) -> None:
+        self._ensure_running()
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out anything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._pending:
+            logger.error("%d pending users could not be flushed on shutdown", len(self._pending))
+
+
+user_provisioner = UserProvisioner(
+    batch_size=settings.USER_PROVISIONING_BATCH_SIZE,
+    flush_interval=settings.USER_PROVISIONING_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.USER_PROVISIONING_MAX_PENDING,
+)
@@ -0,0 +1,286 @@
+"""
+Bulk export and import of user rows.
+
+Export streams the users table through a server-side cursor and yields
+NDJSON or CSV chunks, so memory stays flat however large the table is.
+Import loads batches with asyncpg COPY into a temporary staging table and
+merges them with INSERT ... ON CONFLICT; plaintext passwords are hashed in
+parallel on the password hashing pool, pre-hashed ones are taken as-is.
+"""
+
+import asyncio
+import csv
+import io
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Literal
+
+import orjson
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.security import hash_password_async
+from app.db.replicas import AsyncReadSessionLocal
+from app.db.session import get_async_engine
+from app.models.users import User
+from app.services.user_cache import user_cache
+
+ExportFormat = Literal["ndjson", "csv"]
+ConflictMode = Literal["skip", "update"]
+
+EXPORT_COLUMNS = ["id", "email", "is_active", "is_superuser", "full_name"]
+IMPORT_COLUMNS = [
+    "id", "email", "is_active", "is_superuser", "full_name", "hashed_password", "local_credentials"
+]
+
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+# ===== Export =====
+def _encode_ndjson(columns: list[str], rows: Iterable[tuple]) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def _encode_csv(rows: Iterable[tuple], header: list[str] | None = None) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def export_users(
+    *,
+    fmt: ExportFormat = "ndjson",
+    include_password_hashes: bool = False,
+    batch_size: int = 5000,
+    stats: dict[str, int] | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yield the users table as NDJSON or CSV chunks of `batch_size` rows, ordered by id.
+    Opens its own session so it can outlive the request's dependencies when streamed.
+    """
+    columns = EXPORT_COLUMNS + (
+        ["hashed_password", "local_credentials"] if include_password_hashes else []
+    )
+    statement = (
+        select(*(getattr(User, column) for column in columns))
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if fmt == "csv":
+        yield _encode_csv([], header=columns)
+
+    async with AsyncReadSessionLocal() as session:
+        result = await session.stream(statement)
+        async for partition in result.partitions():
+            # uuid.UUID -> str so both encoders see plain values
+            rows = [(str(row[0]), *row[1:]) for row in partition]
+            if stats is not None:
+                stats["rows"] = stats.get("rows", 0) + len(rows)
+            yield _encode_ndjson(columns, rows) if fmt == "ndjson" else _encode_csv(rows)
+
+
+# ===== Import =====
+@dataclass
+class ImportReport:
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    conflicts: int = 0
+    hashed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "rows_per_second": self.rows_per_second}
+
+
+_TRUE = {"1", "true", "t", "yes", "y"}
+_FALSE = {"0", "false", "f", "no", "n"}
+
+
+def _as_bool(value: Any, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _as_record(row: dict[str, Any], local_credentials: bool) -> tuple:
+    """Staging-table record for a row (hashed_password None while it still needs hashing)."""
+    email = (row.get("email") or "").strip()
+    if "@" not in email:
+        raise ValueError(f"invalid email: {email!r}")
+    return (
+        uuid.UUID(str(row["id"])) if row.get("id") else uuid.uuid4(),
+        email,
+        _as_bool(row.get("is_active"), True),
+        _as_bool(row.get("is_superuser"), False),
+        row.get("full_name") or None,
+        row.get("hashed_password") or None,
+        _as_bool(row.get("local_credentials"), local_credentials),
+    )
+
+
+async def _hash_missing(records: list[tuple], rows: list[dict[str, Any]]) -> int:
+    """Fill in hashes for rows that only carry a plaintext password, a few at a time."""
+    pending = [index for index, record in enumerate(records) if record[5] is None]
+    # Enough in flight to keep every worker busy without hitting PasswordHashingBusy.
+    limit = asyncio.Semaphore(max(1, settings.PASSWORD_HASH_WORKERS) * 2)
+
+    async def hash_one(index: int) -> None:
+        password = rows[index].get("password")
+        if not password:
+            raise ValueError(f"row for {records[index][1]} has neither password nor hashed_password")
+        async with limit:
+            hashed = await hash_password_async(password)
+        records[index] = (*records[index][:5], hashed, *records[index][6:])
+
+    await asyncio.gather(*(hash_one(index) for index in pending))
+    return len(pending)
+
+
+_STAGING_TABLE = "users_import_staging"
+_CREATE_STAGING = f"""
+CREATE TEMPORARY TABLE {_STAGING_TABLE} (
+    id uuid NOT NULL,
+    email varchar(255) NOT NULL,
+    is_active boolean NOT NULL,
+    is_superuser boolean NOT NULL,
+    full_name varchar(255),
+    hashed_password varchar NOT NULL,
+    local_credentials boolean NOT NULL
+) ON COMMIT DROP
+"""
+# Upserting by email can't also resolve the primary key, so before an "update"
+# merge, drop rows whose id belongs to a different email, either in the table
+# or on an earlier row of the same batch.
+_DROP_ID_CONFLICTS = f"""
+    WITH dropped AS (
+        DELETE FROM {_STAGING_TABLE} AS s
+        WHERE EXISTS (
+            SELECT 1 FROM users AS u
+            WHERE u.id = s.id AND lower(u.email) <> lower(s.email)
+        ) OR EXISTS (
+            SELECT 1 FROM {_STAGING_TABLE} AS t
+            WHERE t.id = s.id AND lower(t.email) <> lower(s.email) AND t.ctid < s.ctid
+        )
+        RETURNING 1
+    )
+    SELECT count(*) FROM dropped
+"""
+# DISTINCT ON keeps one row per email (ignoring case, like ix_users_email_lower)
+# if the input repeats it within a batch.
+_MERGE = {
+    "skip": f"""
+        INSERT INTO users (id, email, is_active, is_superuser, full_name, hashed_password, local_credentials)
+        SELECT DISTINCT ON (lower(email))
+            id, email, is_active, is_superuser, full_name, hashed_password, local_credentials
+        FROM {_STAGING_TABLE} ORDER BY lower(email)
+        ON CONFLICT DO NOTHING
+        RETURNING id, true AS inserted
+    """,
+    "update": f"""
+        INSERT INTO users (id, email, is_active, is_superuser, full_name, hashed_password, local_credentials)
+        SELECT DISTINCT ON (lower(email))
+            id, email, is_active, is_superuser, full_name, hashed_password, local_credentials
+        FROM {_STAGING_TABLE} ORDER BY lower(email)
+        ON CONFLICT (lower(email)) DO UPDATE SET
+            is_active = EXCLUDED.is_active,
+            is_superuser = EXCLUDED.is_superuser,
+            full_name = EXCLUDED.full_name,
+            hashed_password = EXCLUDED.hashed_password,
+            local_credentials = EXCLUDED.local_credentials,
+            version = users.version + 1
+        RETURNING id, (xmax = 0) AS inserted
+    """,
+}
+
+
+async def _batches(
+    rows: Iterable[dict[str, Any]] | AsyncIterable[dict[str, Any]], size: int
+) -> AsyncIterator[list[dict[str, Any]]]:
+    batch: list[dict[str, Any]] = []
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    else:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+async def import_users(
+    rows: Iterable[dict[str, Any]] | AsyncIterable[dict[str, Any]],
+    *,
+    on_conflict: ConflictMode = "skip",
+    batch_size: int = 5000,
+    local_credentials: bool = False,
+) -> ImportReport:
+    """
+    Load user rows (dicts with email and either hashed_password or password; id,
+    full_name, is_active, is_superuser and local_credentials optional). Each
+    batch is one transaction. "skip" leaves existing users (by id or email)
+    untouched; "update" overwrites them by email, and counts rows whose id
+    belongs to another email as conflicts instead. `local_credentials` is the
+    default for rows that don't say whether they may log in locally.
+    """
+    report = ImportReport()
+    started = time.perf_counter()
+
+    async with get_async_engine().connect() as conn:
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection  # asyncpg.Connection
+
+        async for batch in _batches(rows, batch_size):
+            records = [_as_record(row, local_credentials) for row in batch]
+            report.hashed += await _hash_missing(records, batch)
+
+            async with driver.transaction():
+                # Created per transaction: behind a transaction-mode pooler the next
+                # batch may run on a different server connection.
+                await driver.execute(_CREATE_STAGING)
+                await driver.copy_records_to_table(
+                    _STAGING_TABLE, records=records, columns=IMPORT_COLUMNS
+                )
+                conflicts = 0
+                if on_conflict == "update":
+                    conflicts = await driver.fetchval(_DROP_ID_CONFLICTS)
+                merged = await driver.fetch(_MERGE[on_conflict])
+
+            inserted = sum(1 for row in merged if row["inserted"])
+            report.rows += len(batch)
+            report.inserted += inserted
+            report.updated += len(merged) - inserted
+            report.conflicts += conflicts
+            report.skipped += len(batch) - len(merged) - conflicts
+            for row in merged:
+                if not row["inserted"]:
+                    user_cache.invalidate(row["id"])
+                    user_cache.invalidation.publish(str(row["id"]))
+
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,180 @@
+"""
+Read-through cache of user rows keyed by id.
+
+Entries are column snapshots, never live ORM instances, so nothing is shared
+between sessions. user_service writes through on create/update; other workers
+are told to drop their copy through a pluggable invalidation backend.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from typing import Callable
+
+import asyncpg
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.users import User
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = [column.key for column in User.__table__.columns]
+
+
+# ===== Cross-worker invalidation =====
+class CacheInvalidationBackend:
+    """Broadcasts invalidations to other workers. The default does nothing (single worker)."""
+
+    async def start(self, on_invalidate: Callable[[str], None]) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def publish(self, user_id: str) -> None:
+        pass
+
+
+class PostgresNotifyInvalidation(CacheInvalidationBackend):
+    """
+    Invalidation over Postgres LISTEN/NOTIFY on a dedicated asyncpg connection.
+
+    An asyncpg connection runs one query at a time, so publish() only queues the
+    id; a single sender task drains the queue, batching whatever has piled up
+    into one round trip. stop() sends everything queued before closing.
+    """
+
+    channel = "user_cache_invalidate"
+
+    def __init__(self, dsn: str) -> None:
+        self.dsn = dsn
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._conn: asyncpg.Connection | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._on_invalidate: Callable[[str], None] | None = None
+        self._queue: asyncio.Queue[str | None] | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self, on_invalidate: Callable[[str], None]) -> None:
+        self._on_invalidate = on_invalidate
+        self._loop = asyncio.get_running_loop()
+        self._conn = await asyncpg.connect(self.dsn)
+        await self._conn.add_listener(self.channel, self._handle)
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._queue.put_nowait(None)  # sentinel: drain what is queued, then exit
+            await self._task
+            self._task = None
+        if self._conn is not None:
+            await self._conn.close()
+        self._conn = None
+        self._queue = None
+
+    def _handle(self, connection, pid, channel, payload: str) -> None:
+        sender, _, user_id = payload.partition(":")
+        if sender != self.worker_id and self._on_invalidate:
+            self._on_invalidate(user_id)
+
+    async def _run(self) -> None:
+        while True:
+            user_ids = [await self._queue.get()]
+            while not self._queue.empty():
+                user_ids.append(self._queue.get_nowait())
+            stopping = None in user_ids
+            pending = list(dict.fromkeys(u for u in user_ids if u is not None))
+            if pending:
+                await self._notify(pending)
+            if stopping:
+                return
+
+    async def _notify(self, user_ids: list[str]) -> None:
+        try:
+            await self._conn.execute(
+                "SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload",
+                self.channel,
+                [f"{self.worker_id}:{user_id}" for user_id in user_ids],
+            )
+        except Exception:
+            logger.exception("Failed to publish %d cache invalidations", len(user_ids))
+
+    def publish(self, user_id: str) -> None:
+        """Queue an invalidation; callable from the event loop or from threadpool threads."""
+        queue, loop = self._queue, self._loop
+        if queue is None or loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            queue.put_nowait(user_id)
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, user_id)
+
+
+# ===== Cache =====
+class UserCache:
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        ttl: float,
+        invalidation: CacheInvalidationBackend | None = None,
+    ) -> None:
+        self._entries: TTLCache[str, dict] = TTLCache(
+            max_entries=max_entries, ttl=ttl, name="user"
+        )
+        self.invalidation = invalidation or CacheInvalidationBackend()
+
+    def get(self, user_id: uuid.UUID | str) -> User | None:
+        snapshot = self._entries.get(str(user_id))
+        return User(**snapshot) if snapshot is not None else None
+
+    def get_version(self, user_id: uuid.UUID | str) -> int | None:
+        """The cached row version, without building a User."""
+        snapshot = self._entries.get(str(user_id))
+        return snapshot["version"] if snapshot is not None else None
+
+    def put(self, user: User) -> None:
+        self._entries.set(str(user.id), {key: getattr(user, key) for key in _COLUMNS})
+
+    def write_through(self, user: User) -> None:
+        """Refresh this worker's entry and invalidate everybody else's."""
+        self.put(user)
+        self.invalidation.publish(str(user.id))
+
+    def invalidate(self, user_id: uuid.UUID | str) -> None:
+        self._entries.pop(str(user_id))
+
+    def stats(self) -> dict[str, int | float]:
+        return self._entries.stats()
+
+    async def start(self) -> None:
+        await self.invalidation.start(self.invalidate)
+
+    async def stop(self) -> None:
+        await self.invalidation.stop()
+
+
+def _invalidation_backend() -> CacheInvalidationBackend:
+    if settings.USER_CACHE_INVALIDATION == "postgres":
+        if settings.DB_POOLER_MODE == "transaction":
+            logger.warning(
+                "USER_CACHE_INVALIDATION=postgres needs a session-mode or direct connection; "
+                "LISTEN does not survive a transaction-mode pooler"
+            )
+        dsn = settings.ASYNC_DATABASE_URI.replace("postgresql+asyncpg://", "postgresql://", 1)
+        return PostgresNotifyInvalidation(dsn)
+    return CacheInvalidationBackend()
+
+
+user_cache = UserCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    invalidation=_invalidation_backend(),
+)
@@ -1,12 +1,15 @@
 import uuid
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, password_needs_rehash, verify_password
 from app.models.users import User
 from app.schemas.users import UserCreate, UserUpdate
+from app.services.user_cache import user_cache
 
 
 def create_user(
@@ -30,9 +33,52 @@ def create_user(
     session.add(db_obj)
     session.commit()
     session.refresh(db_obj)
+    user_cache.write_through(db_obj)
     return db_obj
 
 
+def provision_statement(user_data: dict[str, Any]):
+    """
+    INSERT ... ON CONFLICT (lower(email)) DO UPDATE ... RETURNING the row and
+    whether it was inserted. The no-op update locks and returns the existing
+    row, so concurrent signups for one email resolve in the database.
+    """
+    statement = insert(User).values(**user_data)
+    return (
+        statement.on_conflict_do_update(
+            index_elements=[func.lower(User.email)],
+            set_={"email": User.__table__.c.email},
+        )
+        .returning(User, literal_column("xmax = 0").label("inserted"))
+        .execution_options(populate_existing=True)
+    )
+
+
+def provision_user(
+    *,
+    session: Session,
+    user_create: UserCreate,
+    user_id: uuid.UUID | str | None = None,
+) -> tuple[User, bool]:
+    """
+    Insert the user unless the email (ignoring case) exists, in one round trip.
+    Returns (user, created); an existing user is returned unchanged.
+    """
+
+    user_data = user_create.model_dump(exclude={"password"})
+    user_data["id"] = uuid.UUID(str(user_id)) if user_id else uuid.uuid4()
+    user_data["hashed_password"] = get_password_hash(user_create.password)
+
+    db_obj, created = session.execute(provision_statement(user_data)).one()
+    # RETURNING already loaded the row; detach it so commit doesn't expire it
+    # into a reload SELECT on first access.
+    session.expunge(db_obj)
+    session.commit()
+    if created:
+        user_cache.write_through(db_obj)
+    return db_obj, created
+
+
 def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     """Update user fields, hashing password when provided."""
 
@@ -48,18 +94,51 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     session.add(db_user)
     session.commit()
     session.refresh(db_user)
+    user_cache.write_through(db_user)
     return db_user
 
 
+def email_matches(email: str):
+    """Case-insensitive email comparison, served by ix_users_email_lower."""
+    return func.lower(User.email) == email.strip().lower()
+
+
 def get_user_by_email(*, session: Session, email: str) -> User | None:
-    statement = select(User).where(User.email == email)
+    statement = select(User).where(email_matches(email))
     return session.scalars(statement).first()
 
 
+def rehash_statement(db_user: User, hashed_password: str):
+    """
+    Core UPDATE of the hash, only if it is still the one just verified. It skips
+    the users.version check (the hash isn't in any ETag), so two logins that
+    both upgrade the hash don't fail with StaleDataError; the later one is a no-op.
+    """
+    return (
+        update(User)
+        .where(User.id == db_user.id, User.hashed_password == db_user.hashed_password)
+        .values(hashed_password=hashed_password)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def applied_rehash(db_user: User, hashed_password: str, rowcount: int) -> None:
+    """Reflect a successful rehash_statement on the loaded user and the cache."""
+    if rowcount:
+        set_committed_value(db_user, "hashed_password", hashed_password)
+        user_cache.write_through(db_user)
+
+
 def authenticate(*, session: Session, email: str, password: str) -> User | None:
+    """Check the password, re-hashing it if the scheme or cost has changed."""
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
     if not verify_password(password, db_user.hashed_password):
         return None
+    if password_needs_rehash(db_user.hashed_password):
+        hashed = get_password_hash(password)
+        result = session.execute(rehash_statement(db_user, hashed))
+        session.commit()
+        applied_rehash(db_user, hashed, result.rowcount)
     return db_user
@@ -0,0 +1,138 @@
+"""Shared helpers for the benchmark scripts."""
+
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Iterator
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, float]:
+    """Throughput and latency percentiles (milliseconds) for one run."""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def wait_for_port(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex((host, port)) == 0:
+                return
+        time.sleep(0.1)
+    raise TimeoutError(f"{host}:{port} did not start within {timeout}s")
+
+
+@contextmanager
+def serve(args: list[str], *, port: int, env: dict[str, str] | None = None) -> Iterator[None]:
+    """Run `python <args>` in a subprocess until the block exits."""
+    process = subprocess.Popen(
+        [sys.executable, *args],
+        env={**os.environ, **(env or {})},
+    )
+    try:
+        wait_for_port("127.0.0.1", port)
+        yield
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def run_load(
+    request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]],
+    *,
+    base_url: str,
+    concurrency: int,
+    duration: float,
+) -> dict[str, float]:
+    """Drive `request` from `concurrency` workers for `duration` seconds."""
+    latencies: list[float] = []
+    errors = 0
+    # One client (and keep-alive connection) per worker: a single shared httpx
+    # pool becomes the bottleneck at high concurrency. Clients are built before
+    # the clock starts because each one creates its own SSL context.
+    clients = [httpx.AsyncClient(base_url=base_url, timeout=60) for _ in range(concurrency)]
+
+    async def worker(worker_id: int, client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        iteration = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await request(client, worker_id + iteration * concurrency)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+            iteration += 1
+
+    try:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(i, c) for i, c in enumerate(clients)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await asyncio.gather(*(c.aclose() for c in clients))
+
+    return summarize(latencies, errors, elapsed)
+
+
+def print_table(rows: dict[str, dict[str, float]], precision: int = 1) -> None:
+    columns = ["requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+    width = max(12, *(len(name) + 2 for name in rows))
+    print(f"{'':<{width}}" + "".join(f"{c:>16}" for c in columns))
+    for name, row in rows.items():
+        print(f"{name:<{width}}" + "".join(f"{row[c]:>16.{precision}f}" for c in columns))
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(
+    path: str, benchmark: str, results: dict[str, dict[str, float]], params: dict[str, Any]
+) -> None:
+    """Write a run as JSON, with enough context to compare it later (benchmarks.compare)."""
+    document = {
+        "benchmark": benchmark,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"\nsaved {path}")
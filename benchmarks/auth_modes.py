@@ -0,0 +1,87 @@
+"""
+Compare concurrent logins/sec between AUTH_ROUTES_MODE=sync and =async.
+
+Supabase Auth is replaced by benchmarks.fake_gotrue; Postgres is taken from
+.env as usual. Example:
+
+    python -m benchmarks.auth_modes --concurrency 200 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+
+import httpx
+
+from benchmarks._common import print_table, run_load, serve
+
+JWT_SECRET = "fake-gotrue-secret"
+PASSWORD = "benchmark-password"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--app-port", type=int, default=8001)
+    parser.add_argument("--gotrue-port", type=int, default=9999)
+    args = parser.parse_args()
+
+    gotrue_url = f"http://127.0.0.1:{args.gotrue_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    emails = [f"bench-{i}@example.com" for i in range(args.users)]
+
+    async def login(client: httpx.AsyncClient, n: int) -> httpx.Response:
+        return await client.post(
+            "/api/v1/auth/login",
+            json={"email": emails[n % len(emails)], "password": PASSWORD},
+        )
+
+    fake_gotrue = [
+        "-m", "benchmarks.fake_gotrue",
+        "--port", str(args.gotrue_port),
+        "--jwt-secret", JWT_SECRET,
+        "--latency-ms", str(args.latency_ms),
+    ]
+    results = {}
+    with serve(fake_gotrue, port=args.gotrue_port):
+        for email in emails:
+            httpx.post(
+                f"{gotrue_url}/auth/v1/signup",
+                json={"email": email, "password": PASSWORD},
+            )
+
+        for mode in ("sync", "async"):
+            env = {
+                "AUTH_ROUTES_MODE": mode,
+                "SUPABASE_URL": gotrue_url,
+                "SUPABASE_KEY": "fake-anon-key",
+                "SUPABASE_JWT_SECRET": JWT_SECRET,
+                # Every request comes from 127.0.0.1; measure the routes, not the limiter.
+                "RATE_LIMIT_ENABLED": "false",
+            }
+            app_server = [
+                "-m", "uvicorn", "app.main:app",
+                "--port", str(args.app_port),
+                "--log-level", "warning",
+            ]
+            with serve(app_server, port=args.app_port, env=env):
+                # First logins provision the local rows; keep them out of the numbers.
+                asyncio.run(
+                    run_load(login, base_url=app_url, concurrency=len(emails), duration=0.5)
+                )
+                results[mode] = asyncio.run(
+                    run_load(
+                        login,
+                        base_url=app_url,
+                        concurrency=args.concurrency,
+                        duration=args.duration,
+                    )
+                )
+
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
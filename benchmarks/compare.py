@@ -0,0 +1,66 @@
+"""
+Compare two benchmark result files written with --json.
+
+Prints every metric the runs have in common with the change relative to the
+baseline. Latencies going up and throughput going down are both regressions. Exits
+non-zero when one exceeds --threshold percent, or when the error count rises.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+
+# Higher is better for these; every other metric (latencies, errors) is lower-is-better.
+HIGHER_IS_BETTER = {"throughput_rps"}
+IGNORED = {"requests"}
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression limit, percent")
+    args = parser.parse_args()
+
+    baseline, current = _load(args.baseline), _load(args.current)
+    if baseline["benchmark"] != current["benchmark"]:
+        sys.exit(f"different benchmarks: {baseline['benchmark']} vs {current['benchmark']}")
+    print(
+        f"{baseline['benchmark']}: {baseline.get('git_commit')} ({baseline['timestamp']}) -> "
+        f"{current.get('git_commit')} ({current['timestamp']})"
+    )
+    if baseline["params"] != current["params"]:
+        print(f"warning: parameters differ\n  {baseline['params']}\n  {current['params']}")
+
+    regressions = []
+    print(f"\n{'':<28}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}")
+    for row, before in baseline["results"].items():
+        after = current["results"].get(row)
+        if after is None:
+            continue
+        for metric, old in before.items():
+            new = after.get(metric)
+            if metric in IGNORED or new is None or not isinstance(old, (int, float)):
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            regressed = new > old if metric == "errors" else worse > args.threshold
+            flag = "  <-- regression" if regressed else ""
+            if regressed:
+                regressions.append((row, metric))
+            print(f"{row:<28}{metric:<16}{old:>12.3f}{new:>12.3f}{change:>+9.1f}%{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
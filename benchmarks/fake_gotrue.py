@@ -0,0 +1,211 @@
+"""
+Minimal in-memory stand-in for Supabase Auth (GoTrue), for local benchmarks.
+
+Implements the endpoints used by app/routes/auth.py and get_current_user and
+issues HS256 access tokens signed with --jwt-secret, so the app can verify them
+locally with SUPABASE_JWT_SECRET set to the same value.
+
+Faults can be injected at start-up (--latency-ms, --fail-status, --fail-rate) or
+at runtime with `POST /__faults {"latency_ms": 3000, "fail_status": 503, "fail_rate": 1}`.
+
+    python -m benchmarks.fake_gotrue --port 9999 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+import jwt
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+ACCESS_TOKEN_TTL = 3600
+
+
+class FakeGoTrue:
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        jwt_secret: str,
+        latency_ms: float = 0.0,
+        fail_status: int = 503,
+        fail_rate: float = 0.0,
+    ) -> None:
+        self.issuer = f"{base_url.rstrip('/')}/auth/v1"
+        self.jwt_secret = jwt_secret
+        self.latency = latency_ms / 1000
+        self.fail_status = fail_status
+        self.fail_rate = fail_rate
+        self.users: dict[str, dict] = {}  # email -> user record
+
+    # ----- helpers -----
+    async def _delay(self) -> Response | None:
+        """Apply injected latency; return an error response for injected failures."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            return self._error(self.fail_status, "injected failure")
+        return None
+
+    def _user_json(self, record: dict) -> dict:
+        return {
+            "id": record["id"],
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": record["email"],
+            "app_metadata": {"provider": "email"},
+            "user_metadata": record["user_metadata"],
+            "created_at": record["created_at"],
+            "email_confirmed_at": record["created_at"],
+        }
+
+    def _session_json(self, record: dict) -> dict:
+        now = int(time.time())
+        access_token = jwt.encode(
+            {
+                "sub": record["id"],
+                "aud": "authenticated",
+                "iss": self.issuer,
+                "role": "authenticated",
+                "email": record["email"],
+                "iat": now,
+                "exp": now + ACCESS_TOKEN_TTL,
+            },
+            self.jwt_secret,
+            algorithm="HS256",
+        )
+        return {
+            "access_token": access_token,
+            "refresh_token": uuid.uuid4().hex,
+            "token_type": "bearer",
+            "expires_in": ACCESS_TOKEN_TTL,
+            "expires_at": now + ACCESS_TOKEN_TTL,
+            "user": self._user_json(record),
+        }
+
+    def _create(self, email: str, password: str, user_metadata: dict | None = None) -> dict:
+        record = {
+            "id": str(uuid.uuid4()),
+            "email": email,
+            "password": password,
+            "user_metadata": user_metadata or {},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.users[email] = record
+        return record
+
+    def _user_from_bearer(self, request: Request) -> dict | None:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        try:
+            claims = jwt.decode(
+                token, self.jwt_secret, algorithms=["HS256"], audience="authenticated"
+            )
+        except jwt.PyJWTError:
+            return None
+        return self.users.get(claims.get("email"))
+
+    @staticmethod
+    def _error(status: int, message: str) -> JSONResponse:
+        return JSONResponse({"code": status, "msg": message}, status_code=status)
+
+    # ----- endpoints -----
+    async def signup(self, request: Request) -> Response:
+        if fault := await self._delay():
+            return fault
+        body = await request.json()
+        if body["email"] in self.users:
+            return self._error(422, "User already registered")
+        record = self._create(body["email"], body["password"], body.get("data"))
+        return JSONResponse(self._session_json(record))
+
+    async def token(self, request: Request) -> Response:
+        if fault := await self._delay():
+            return fault
+        body = await request.json()
+        record = self.users.get(body.get("email"))
+        if not record or record["password"] != body.get("password"):
+            return self._error(400, "Invalid login credentials")
+        return JSONResponse(self._session_json(record))
+
+    async def verify(self, request: Request) -> Response:
+        if fault := await self._delay():
+            return fault
+        body = await request.json()
+        record = self.users.get(body.get("email")) or self._create(
+            body["email"], uuid.uuid4().hex
+        )
+        return JSONResponse(self._session_json(record))
+
+    async def empty_ok(self, request: Request) -> Response:
+        if fault := await self._delay():
+            return fault
+        return JSONResponse({})
+
+    async def user(self, request: Request) -> Response:
+        if fault := await self._delay():
+            return fault
+        record = self._user_from_bearer(request)
+        if record is None:
+            return self._error(401, "invalid JWT")
+        if request.method == "PUT":
+            body = await request.json()
+            record["password"] = body.get("password", record["password"])
+        return JSONResponse(self._user_json(record))
+
+    async def faults(self, request: Request) -> Response:
+        body = await request.json()
+        if "latency_ms" in body:
+            self.latency = body["latency_ms"] / 1000
+        self.fail_status = body.get("fail_status", self.fail_status)
+        self.fail_rate = body.get("fail_rate", self.fail_rate)
+        return JSONResponse(
+            {
+                "latency_ms": self.latency * 1000,
+                "fail_status": self.fail_status,
+                "fail_rate": self.fail_rate,
+            }
+        )
+
+    def app(self) -> Starlette:
+        return Starlette(
+            routes=[
+                Route("/__faults", self.faults, methods=["POST"]),
+                Route("/auth/v1/signup", self.signup, methods=["POST"]),
+                Route("/auth/v1/token", self.token, methods=["POST"]),
+                Route("/auth/v1/verify", self.verify, methods=["POST"]),
+                Route("/auth/v1/resend", self.empty_ok, methods=["POST"]),
+                Route("/auth/v1/recover", self.empty_ok, methods=["POST"]),
+                Route("/auth/v1/user", self.user, methods=["GET", "PUT"]),
+            ]
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--jwt-secret", default="fake-gotrue-secret")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests to fail")
+    args = parser.parse_args()
+
+    fake = FakeGoTrue(
+        base_url=f"http://{args.host}:{args.port}",
+        jwt_secret=args.jwt_secret,
+        latency_ms=args.latency_ms,
+        fail_status=args.fail_status,
+        fail_rate=args.fail_rate,
+    )
+    uvicorn.run(fake.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
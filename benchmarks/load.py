@@ -0,0 +1,146 @@
+"""
+Scripted HTTP load against the app with Supabase Auth faked locally.
+
+Starts benchmarks.fake_gotrue and the app, signs up --users accounts, turns
+on the --latency-ms / --fail-rate faults (so setup itself never fails), then
+drives each scenario in turn for --duration seconds at --concurrency:
+
+- signup: POST /auth/signup with a fresh email per request
+- login: POST /auth/login as one of the prepared users
+- me, me_async, protected: GET /users/me, /users/me/async, /users/protected
+  with the prepared users' tokens
+
+Prints throughput and p50/p95/p99 per scenario; --json saves the run for
+benchmarks.compare. App settings can be varied with --env KEY=VALUE.
+
+    python -m benchmarks.load --concurrency 50 --duration 10 --json run.json
+    python -m benchmarks.load --scenarios me protected --env AUTH_TOKEN_VERIFICATION=remote --latency-ms 30
+"""
+
+import argparse
+import asyncio
+import uuid
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks._common import print_table, run_load, save_results, serve
+
+JWT_SECRET = "fake-gotrue-secret"
+PASSWORD = "benchmark-password"
+SCENARIOS = ["signup", "login", "me", "me_async", "protected"]
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+async def _prepare_users(base_url: str, count: int, run_id: str) -> list[tuple[str, str]]:
+    """Sign up `count` users through the app; returns (email, access_token) pairs."""
+    limit = asyncio.Semaphore(20)
+
+    async def signup(client: httpx.AsyncClient, i: int) -> tuple[str, str]:
+        email = f"load-{run_id}-user-{i}@example.com"
+        async with limit:
+            response = await client.post(
+                "/api/v1/auth/signup", json={"email": email, "password": PASSWORD}
+            )
+        response.raise_for_status()
+        return email, response.json()["access_token"]
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        return list(await asyncio.gather(*(signup(client, i) for i in range(count))))
+
+
+def _scenarios(users: list[tuple[str, str]], run_id: str) -> dict[str, Request]:
+    def bearer(n: int) -> dict[str, str]:
+        return {"Authorization": f"Bearer {users[n % len(users)][1]}"}
+
+    async def signup(client: httpx.AsyncClient, n: int) -> httpx.Response:
+        return await client.post(
+            "/api/v1/auth/signup",
+            json={"email": f"load-{run_id}-new-{n}@example.com", "password": PASSWORD},
+        )
+
+    async def login(client: httpx.AsyncClient, n: int) -> httpx.Response:
+        email = users[n % len(users)][0]
+        return await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+
+    def get(path: str) -> Request:
+        async def request(client: httpx.AsyncClient, n: int) -> httpx.Response:
+            return await client.get(path, headers=bearer(n))
+
+        return request
+
+    return {
+        "signup": signup,
+        "login": login,
+        "me": get("/api/v1/users/me"),
+        "me_async": get("/api/v1/users/me/async"),
+        "protected": get("/api/v1/users/protected"),
+    }
+
+
+async def _inject_faults(gotrue_url: str, args: argparse.Namespace) -> None:
+    async with httpx.AsyncClient(base_url=gotrue_url) as client:
+        response = await client.post(
+            "/__faults", json={"latency_ms": args.latency_ms, "fail_rate": args.fail_rate}
+        )
+        response.raise_for_status()
+
+
+async def _run(base_url: str, gotrue_url: str, args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    run_id = uuid.uuid4().hex[:8]
+    users = await _prepare_users(base_url, args.users, run_id)
+    await _inject_faults(gotrue_url, args)
+    requests = _scenarios(users, run_id)
+    results = {}
+    for name in args.scenarios:
+        results[name] = await run_load(
+            requests[name], base_url=base_url, concurrency=args.concurrency, duration=args.duration
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=50, help="accounts prepared for login and GETs")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fake Supabase Auth latency")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fake Supabase Auth error rate")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="app setting")
+    parser.add_argument("--app-port", type=int, default=8001)
+    parser.add_argument("--gotrue-port", type=int, default=9999)
+    parser.add_argument("--json", metavar="PATH", help="save results for benchmarks.compare")
+    args = parser.parse_args()
+
+    gotrue_url = f"http://127.0.0.1:{args.gotrue_port}"
+    env = {
+        "SUPABASE_URL": gotrue_url,
+        "SUPABASE_KEY": "fake-anon-key",
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        # Every request comes from 127.0.0.1; measure the routes, not the limiter.
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    env.update(item.split("=", 1) for item in args.env)
+
+    fake_gotrue = [
+        "-m", "benchmarks.fake_gotrue",
+        "--port", str(args.gotrue_port),
+        "--jwt-secret", JWT_SECRET,
+    ]
+    app = ["-m", "uvicorn", "app.main:app", "--port", str(args.app_port), "--log-level", "warning"]
+    with serve(fake_gotrue, port=args.gotrue_port), serve(app, port=args.app_port, env=env):
+        results = asyncio.run(_run(f"http://127.0.0.1:{args.app_port}", gotrue_url, args))
+
+    print_table(results)
+    if args.json:
+        params = {
+            key: getattr(args, key)
+            for key in ("scenarios", "concurrency", "duration", "users", "latency_ms", "fail_rate")
+        }
+        save_results(args.json, "load", results, {**params, "env": env})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Per-call cost of the metrics hooks, measured in-process without network noise.
+
+- http: a trivial route driven straight through the ASGI stack, with and
+  without MetricsMiddleware
+- db: `SELECT 1` on an in-memory SQLite engine, with and without the
+  before/after_cursor_execute hooks
+- supabase: timed_auth_call() around a no-op
+
+    python -m benchmarks.metrics_overhead --number 20000
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI, Response
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import REGISTRY
+from app.core.middleware import MetricsMiddleware
+from app.db.session import _instrument_queries
+from app.db.supabase import timed_auth_call
+
+
+def _build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return Response(b"{}", media_type="application/json")
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def bench_http(with_metrics: bool, number: int) -> float:
+    app = _build_app(with_metrics)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run() -> float:
+        for _ in range(200):  # warm up routing and the middleware stack
+            await app(dict(scope), receive, send)
+        started = time.perf_counter()
+        for _ in range(number):
+            await app(dict(scope), receive, send)
+        return time.perf_counter() - started
+
+    return asyncio.run(run())
+
+
+def bench_db(with_metrics: bool, number: int) -> float:
+    engine = create_engine("sqlite://")
+    if with_metrics:
+        _instrument_queries(engine, "bench")
+    statement = text("SELECT 1")
+    with engine.connect() as conn:
+        conn.execute(statement)
+        started = time.perf_counter()
+        for _ in range(number):
+            conn.execute(statement)
+        return time.perf_counter() - started
+
+
+def bench_supabase(with_metrics: bool, number: int) -> float:
+    started = time.perf_counter()
+    if with_metrics:
+        for _ in range(number):
+            with timed_auth_call("bench"):
+                pass
+    else:
+        for _ in range(number):
+            pass
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'':<10}{'off us/op':>12}{'on us/op':>12}{'overhead us':>14}")
+    for name, bench in (("http", bench_http), ("db", bench_db), ("supabase", bench_supabase)):
+        off = bench(False, args.number) / args.number * 1e6
+        on = bench(True, args.number) / args.number * 1e6
+        print(f"{name:<10}{off:>12.2f}{on:>12.2f}{on - off:>14.2f}")
+
+    started = time.perf_counter()
+    rendered = REGISTRY.render()
+    print(f"\n/metrics render: {(time.perf_counter() - started) * 1e3:.2f} ms, {len(rendered)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+In-process microbenchmarks for app/core/security.py and app/services/user_service.py.
+
+Each operation is timed call by call and reported as ops/s with p50/p95/p99
+(in the same table as the HTTP benchmarks). Password hashing runs --hash-number
+times, everything else --number times. The user service runs against an
+in-memory SQLite database by default so results don't depend on a network;
+pass --database-url to measure a real Postgres.
+
+    python -m benchmarks.micro --json micro.json
+"""
+
+import argparse
+import time
+import uuid
+from datetime import timedelta
+from typing import Callable
+
+import jwt
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.config import settings
+from app.models.users import User
+from app.schemas.users import UserCreate, UserUpdate
+from app.services import user_service
+from benchmarks._common import print_table, save_results, summarize
+
+JWT_SECRET = "micro-benchmark-secret"
+
+
+def _time(func: Callable[[int], object], number: int) -> dict[str, float]:
+    func(number)  # warm up caches and lazy imports, outside the timed indexes
+    latencies = []
+    started = time.perf_counter()
+    for i in range(number):
+        call_started = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, 0, time.perf_counter() - started)
+
+
+def bench_security(number: int, hash_number: int) -> dict[str, dict[str, float]]:
+    settings.SECRET_KEY = settings.SECRET_KEY or JWT_SECRET
+    settings.SUPABASE_JWT_SECRET = JWT_SECRET
+    hashed = security.get_password_hash("benchmark-password")
+    access_token = security.create_access_token("user-id", timedelta(minutes=5))
+    now = int(time.time())
+    supabase_token = jwt.encode(
+        {
+            "sub": str(uuid.uuid4()),
+            "aud": settings.SUPABASE_JWT_AUDIENCE,
+            "iss": settings.SUPABASE_JWT_ISSUER or settings.SUPABASE_AUTH_URL,
+            "iat": now,
+            "exp": now + 3600,
+        },
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+
+    return {
+        "get_password_hash": _time(lambda i: security.get_password_hash("benchmark-password"), hash_number),
+        "verify_password": _time(lambda i: security.verify_password("benchmark-password", hashed), hash_number),
+        "create_access_token": _time(
+            lambda i: security.create_access_token("user-id", timedelta(minutes=5)), number
+        ),
+        "decode_access_token": _time(lambda i: security.decode_access_token(access_token), number),
+        "decode_supabase_token": _time(lambda i: security.decode_supabase_token(supabase_token), number),
+        "peek_token_expiry": _time(lambda i: security.peek_token_expiry(supabase_token), number),
+    }
+
+
+def bench_user_service(number: int, hash_number: int, database_url: str) -> dict[str, dict[str, float]]:
+    engine = create_engine(database_url)
+    if database_url.startswith("sqlite"):
+        User.__table__.create(engine)
+    prefix = f"micro-{uuid.uuid4().hex[:8]}-"
+    results = {}
+    try:
+        with Session(engine) as session:
+            results["create_user"] = _time(
+                lambda i: user_service.create_user(
+                    session=session,
+                    user_create=UserCreate(email=f"{prefix}{i}@example.com", password="benchmark-password"),
+                ),
+                hash_number,
+            )
+            email = f"{prefix}1@example.com"
+            user = user_service.get_user_by_email(session=session, email=email)
+            session.expunge_all()  # measure the query, not the identity map
+            results["get_user_by_email"] = _time(
+                lambda i: user_service.get_user_by_email(
+                    session=session, email=f"{prefix}{i % hash_number}@example.com"
+                ),
+                number,
+            )
+            results["update_user"] = _time(
+                lambda i: user_service.update_user(
+                    session=session, db_user=user, user_in=UserUpdate(full_name=f"Micro {i}")
+                ),
+                number,
+            )
+            results["authenticate"] = _time(
+                lambda i: user_service.authenticate(
+                    session=session, email=email, password="benchmark-password"
+                ),
+                hash_number,
+            )
+    finally:
+        with Session(engine) as session:
+            session.execute(delete(User).where(User.email.like(f"{prefix}%")))
+            session.commit()
+        engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--hash-number", type=int, default=20, help="iterations for bcrypt-bound operations")
+    parser.add_argument("--database-url", default="sqlite://", help="SQLAlchemy URL for the user service")
+    parser.add_argument("--json", metavar="PATH", help="save results for benchmarks.compare")
+    args = parser.parse_args()
+
+    results = {
+        **{f"security.{k}": v for k, v in bench_security(args.number, args.hash_number).items()},
+        **{
+            f"user_service.{k}": v
+            for k, v in bench_user_service(args.number, args.hash_number, args.database_url).items()
+        },
+    }
+    print_table(results, precision=3)
+    if args.json:
+        params = {"number": args.number, "hash_number": args.hash_number, "database_url": args.database_url}
+        save_results(args.json, "micro", results, params)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Tail latency of /users/me during a signup storm, with and without the
+password hashing process pool (PASSWORD_HASH_WORKERS=0 hashes in a thread).
+
+    python -m benchmarks.password_hashing --storm-concurrency 20 --workers 2
+"""
+
+import argparse
+import asyncio
+import uuid
+
+import httpx
+
+from benchmarks._common import print_table, run_load, serve
+
+JWT_SECRET = "fake-gotrue-secret"
+PASSWORD = "benchmark-password"
+
+
+async def _measure(base_url: str, args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        response = await client.post(
+            "/api/v1/auth/signup",
+            json={"email": f"probe-{uuid.uuid4().hex}@example.com", "password": PASSWORD},
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def users_me(client: httpx.AsyncClient, n: int) -> httpx.Response:
+        return await client.get("/api/v1/users/me", headers=headers)
+
+    async def signup(client: httpx.AsyncClient, n: int) -> httpx.Response:
+        return await client.post(
+            "/api/v1/auth/signup",
+            json={"email": f"storm-{uuid.uuid4().hex}@example.com", "password": PASSWORD},
+        )
+
+    probe, storm = await asyncio.gather(
+        run_load(users_me, base_url=base_url, concurrency=args.probe_concurrency, duration=args.duration),
+        run_load(signup, base_url=base_url, concurrency=args.storm_concurrency, duration=args.duration),
+    )
+    return {"users/me": probe, "signup": storm}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--storm-concurrency", type=int, default=20)
+    parser.add_argument("--probe-concurrency", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--app-port", type=int, default=8001)
+    parser.add_argument("--gotrue-port", type=int, default=9999)
+    args = parser.parse_args()
+
+    gotrue_url = f"http://127.0.0.1:{args.gotrue_port}"
+    fake_gotrue = [
+        "-m", "benchmarks.fake_gotrue",
+        "--port", str(args.gotrue_port),
+        "--jwt-secret", JWT_SECRET,
+    ]
+    app_server = [
+        "-m", "uvicorn", "app.main:app",
+        "--port", str(args.app_port),
+        "--log-level", "warning",
+    ]
+
+    results = {}
+    with serve(fake_gotrue, port=args.gotrue_port):
+        for workers in (0, args.workers):
+            env = {
+                "PASSWORD_HASH_WORKERS": str(workers),
+                "SUPABASE_URL": gotrue_url,
+                "SUPABASE_KEY": "fake-anon-key",
+                "SUPABASE_JWT_SECRET": JWT_SECRET,
+                # Every request comes from 127.0.0.1; measure the routes, not the limiter.
+                "RATE_LIMIT_ENABLED": "false",
+            }
+            with serve(app_server, port=args.app_port, env=env):
+                run = asyncio.run(_measure(f"http://127.0.0.1:{args.app_port}", args))
+            label = "thread" if workers == 0 else f"pool[{workers}]"
+            for name, row in run.items():
+                results[f"{label} {name}"] = row
+
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Latency of the hot user-by-id lookup per DB_POOLER_MODE.
+
+Each mode gets its own async engine built exactly as the app builds it
+(pool class, pre-ping, statement cache and prepared statement naming), then
+`concurrency` workers look up random existing users for `duration` seconds,
+one session per lookup like get_current_user. Point --session-url and
+--transaction-url at Supavisor's 5432 and 6543 ports; without them every mode
+connects to the configured database, which isolates the client-side cost
+(pre-ping round trip, re-preparing statements) from the pooler's.
+
+    python -m benchmarks.pooler_modes --transaction-url postgresql://user:pw@host:6543/postgres
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.db.session import build_async_engine
+from app.models.users import User
+from benchmarks._common import print_table, summarize
+
+
+def _async_url(url: str | None) -> str:
+    if url is None:
+        return settings.ASYNC_DATABASE_URI
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+async def _lookups(engine: AsyncEngine, user_ids: list, *, concurrency: int, duration: float) -> dict[str, float]:
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with AsyncSession(engine) as session:
+                    await session.execute(select(User).where(User.id == random.choice(user_ids)))
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    urls = {
+        "direct": _async_url(args.direct_url),
+        "session": _async_url(args.session_url),
+        "transaction": _async_url(args.transaction_url),
+    }
+    results = {}
+    user_ids: list = []
+    for mode, url in urls.items():
+        settings.DB_POOLER_MODE = mode
+        engine = build_async_engine(url, f"bench-{mode}")
+        try:
+            if not user_ids:
+                async with AsyncSession(engine) as session:
+                    user_ids = list(await session.scalars(select(User.id).limit(args.users)))
+                if not user_ids:
+                    raise SystemExit("no users in the database; run the app or an import first")
+            # Warm the pool so the first mode isn't charged for connecting.
+            await _lookups(engine, user_ids, concurrency=args.concurrency, duration=0.5)
+            results[mode] = await _lookups(
+                engine, user_ids, concurrency=args.concurrency, duration=args.duration
+            )
+        finally:
+            await engine.dispose()
+    print_table(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--direct-url", help="defaults to the configured database")
+    parser.add_argument("--session-url", help="session-mode pooler URL (default: configured database)")
+    parser.add_argument("--transaction-url", help="transaction-mode pooler URL (default: configured database)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=1000, help="distinct user ids to look up")
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Per-response serialization cost: FastAPI's default path vs precompiled adapters.
+
+"before" reproduces what FastAPI does for the old routes (jsonable_encoder on the
+ORM row for /users/me, response_model re-validation for AuthResponse); "after"
+is app.core.responses.
+
+    python -m benchmarks.serialization --number 20000
+"""
+
+import argparse
+import asyncio
+import timeit
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.core.responses import auth_response, user_public_response
+from app.models.users import User
+from app.schemas.users import AuthResponse, UserPublic
+
+ACCESS_TOKEN = "x" * 800  # typical Supabase access token length
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+
+    user = User(
+        id=uuid.uuid4(),
+        email="bench@example.com",
+        is_active=True,
+        is_superuser=False,
+        full_name="Bench Mark",
+        hashed_password="$2b$12$" + "a" * 53,
+    )
+    auth_field = APIRoute("/", lambda: None, response_model=AuthResponse).response_field
+    loop = asyncio.new_event_loop()
+
+    def users_me_before() -> None:
+        JSONResponse(jsonable_encoder(user))
+
+    def auth_before_render() -> None:
+        content = AuthResponse(access_token=ACCESS_TOKEN, user=UserPublic.model_validate(user))
+        JSONResponse(
+            loop.run_until_complete(serialize_response(field=auth_field, response_content=content))
+        )
+
+    cases = {
+        "users/me before": users_me_before,
+        "users/me after": lambda: user_public_response(user),
+        "auth before": auth_before_render,
+        "auth after": lambda: auth_response(ACCESS_TOKEN, user),
+    }
+    print(f"{'':<18}{'us/response':>14}")
+    for name, func in cases.items():
+        elapsed = timeit.timeit(func, number=args.number)
+        print(f"{name:<18}{elapsed / args.number * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Database time of the signup write: check-then-create versus one upsert.
+
+"check_then_create" is the old signup path: get_user_by_email, then
+create_user's add / commit / refresh. "provision" is provision_user's single
+INSERT ... ON CONFLICT (lower(email)) ... RETURNING plus commit. Both run the
+same rows against the configured database with a precomputed password hash,
+so only the database work is timed, and report statements per signup. The
+"_existing" variants sign up emails that already exist, in upper case: the
+exact-match check misses them, so check_then_create inserts a duplicate
+without ix_users_email_lower and fails on it (an error) with it.
+
+Run it before and after `alembic upgrade head` to see the effect of
+ix_users_email_lower on the lookups (provision needs the index to exist).
+
+    python -m benchmarks.signup_provisioning --concurrency 10 --duration 5
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.session import build_async_engine
+from app.models.users import User
+from app.services.user_service import provision_statement
+from benchmarks._common import print_table, save_results, summarize
+
+Signup = Callable[[AsyncSession, str], Awaitable[None]]
+
+
+def _values(email: str, hashed: str) -> dict:
+    return {"id": uuid.uuid4(), "email": email, "full_name": "Bench", "hashed_password": hashed}
+
+
+def _flows(hashed: str) -> dict[str, Signup]:
+    async def check_then_create(session: AsyncSession, email: str) -> None:
+        existing = (await session.scalars(select(User).where(User.email == email))).first()
+        if existing is not None:
+            return
+        user = User(**_values(email, hashed))
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+
+    async def provision(session: AsyncSession, email: str) -> None:
+        await session.execute(provision_statement(_values(email, hashed)))
+        await session.commit()
+
+    return {"check_then_create": check_then_create, "provision": provision}
+
+
+async def _signups(
+    engine: AsyncEngine, signup: Signup, emails: Callable[[int], str], *, concurrency: int, duration: float
+) -> dict[str, float]:
+    latencies: list[float] = []
+    errors = 0
+    counter = 0
+
+    async def worker() -> None:
+        nonlocal errors, counter
+        while time.perf_counter() < deadline:
+            counter += 1
+            email = emails(counter)
+            started = time.perf_counter()
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    await signup(session, email)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    engine = build_async_engine(settings.ASYNC_DATABASE_URI, "bench-signup")
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(*_) -> None:
+        nonlocal statements
+        statements += 1
+
+    prefix = f"signup-{uuid.uuid4().hex[:8]}"
+    hashed = get_password_hash("benchmark-password")
+    results = {}
+    per_signup = {}
+    try:
+        for name, signup in _flows(hashed).items():
+            # Warm the pool so the first flow isn't charged for connecting.
+            await _signups(
+                engine, signup, lambda n: f"{prefix}-warm-{name}-{n}@example.com",
+                concurrency=args.concurrency, duration=0.5,
+            )
+            for label, email in (
+                (name, lambda n: f"{prefix}-{name}-{n}@example.com"),
+                # The first rows created above again, upper-cased.
+                (f"{name}_existing", lambda n: f"{prefix}-{name}-{n % 100 + 1}@example.com".upper()),
+            ):
+                statements = 0
+                results[label] = await _signups(
+                    engine, signup, email, concurrency=args.concurrency, duration=args.duration
+                )
+                attempts = results[label]["requests"] + results[label]["errors"]
+                per_signup[label] = statements / attempts if attempts else 0.0
+    finally:
+        async with AsyncSession(engine) as session:
+            await session.execute(delete(User).where(User.email.ilike(f"{prefix}-%")))
+            await session.commit()
+        await engine.dispose()
+
+    print_table(results, precision=2)
+    print()
+    for label, count in per_signup.items():
+        print(f"{label}: {count:.1f} statements per signup")
+    if args.json:
+        params = {"concurrency": args.concurrency, "duration": args.duration}
+        save_results(args.json, "signup_provisioning", results, params)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--json", metavar="PATH", help="save results for benchmarks.compare")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
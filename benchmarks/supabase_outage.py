@@ -0,0 +1,135 @@
+"""
+/users/me behaviour while Supabase Auth is slow or failing, against the fake
+GoTrue server with injected faults.
+
+Tokens are checked remotely (AUTH_TOKEN_VERIFICATION=remote, token cache off)
+so every request calls supabase.auth.get_user. Phases: healthy, slow (latency
+above the call timeout), failing (HTTP 503), recovered. Once the breaker opens
+requests should fail fast with 503 instead of waiting out the timeout, and
+recover after the reset period. Exits non-zero if they don't.
+
+    python -m benchmarks.supabase_outage --timeout 1 --reset 3
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+from benchmarks._common import percentile, serve
+
+JWT_SECRET = "fake-gotrue-secret"
+PASSWORD = "benchmark-password"
+
+
+async def _phase(
+    base_url: str, headers: dict[str, str], *, concurrency: int, duration: float
+) -> tuple[Counter, list[float]]:
+    statuses: Counter = Counter()
+    latencies: list[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get("/api/v1/users/me", headers=headers)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses, latencies
+
+
+def _breaker_state(metrics: str) -> str:
+    match = re.search(r'supabase_auth_circuit_state\{state="(\w+)"\} 1', metrics)
+    return match.group(1) if match else "?"
+
+
+async def _run(base_url: str, gotrue_url: str, args: argparse.Namespace) -> bool:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        response = await client.post(
+            "/api/v1/auth/signup",
+            json={"email": f"outage-{uuid.uuid4().hex}@example.com", "password": PASSWORD},
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        phases = {
+            "healthy": {"latency_ms": 0, "fail_rate": 0},
+            "slow": {"latency_ms": args.timeout * 3000, "fail_rate": 0},
+            "failing": {"latency_ms": 0, "fail_rate": 1, "fail_status": 503},
+            "recovered": {"latency_ms": 0, "fail_rate": 0},
+        }
+        results = {}
+        for name, faults in phases.items():
+            await client.post(f"{gotrue_url}/__faults", json=faults)
+            if name == "recovered":
+                await asyncio.sleep(args.reset)  # let the breaker go half-open
+            statuses, latencies = await _phase(
+                base_url, headers, concurrency=args.concurrency, duration=args.duration
+            )
+            state = _breaker_state((await client.get("/metrics")).text)
+            results[name] = (statuses, latencies, state)
+
+    print(f"{'':<12}{'requests':>10}{'200':>8}{'503':>8}{'other':>8}{'p50_ms':>10}{'p99_ms':>10}  breaker")
+    for name, (statuses, latencies, state) in results.items():
+        other = sum(statuses.values()) - statuses[200] - statuses[503]
+        print(
+            f"{name:<12}{len(latencies):>10}{statuses[200]:>8}{statuses[503]:>8}{other:>8}"
+            f"{percentile(latencies, 50) * 1000:>10.1f}{percentile(latencies, 99) * 1000:>10.1f}  {state}"
+        )
+
+    checks = {
+        "healthy requests succeed": set(results["healthy"][0]) == {200},
+        "slow phase fails fast once open": percentile(results["slow"][1], 50) < args.timeout / 2,
+        "failing phase returns 503": set(results["failing"][0]) == {503},
+        "recovers after reset": results["recovered"][0][200] > 0
+        and results["recovered"][2] == "closed",
+    }
+    for check, ok in checks.items():
+        print(f"{'PASS' if ok else 'FAIL'}  {check}")
+    return all(checks.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--timeout", type=float, default=1.0, help="SUPABASE_AUTH_TIMEOUT")
+    parser.add_argument("--reset", type=float, default=3.0, help="breaker reset seconds")
+    parser.add_argument("--threshold", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--app-port", type=int, default=8001)
+    parser.add_argument("--gotrue-port", type=int, default=9999)
+    args = parser.parse_args()
+
+    gotrue_url = f"http://127.0.0.1:{args.gotrue_port}"
+    env = {
+        "SUPABASE_URL": gotrue_url,
+        "SUPABASE_KEY": "benchmark-key",
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "AUTH_TOKEN_VERIFICATION": "remote",
+        "AUTH_TOKEN_CACHE_TTL_SECONDS": "0",
+        "AUTH_NEGATIVE_CACHE_TTL_SECONDS": "0",
+        "SUPABASE_AUTH_TIMEOUT": str(args.timeout),
+        "SUPABASE_AUTH_BREAKER_FAILURE_THRESHOLD": str(args.threshold),
+        "SUPABASE_AUTH_BREAKER_RESET_SECONDS": str(args.reset),
+    }
+    fake_gotrue = [
+        "-m", "benchmarks.fake_gotrue",
+        "--port", str(args.gotrue_port),
+        "--jwt-secret", JWT_SECRET,
+    ]
+    app = ["-m", "uvicorn", "app.main:app", "--port", str(args.app_port), "--log-level", "warning"]
+    with serve(fake_gotrue, port=args.gotrue_port), serve(app, port=args.app_port, env=env):
+        ok = asyncio.run(_run(f"http://127.0.0.1:{args.app_port}", gotrue_url, args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Bulk user import/export throughput against the configured Postgres.
+
+"per-row" mirrors create_user without hashing (INSERT, COMMIT and refresh per
+user); "copy" is app.services.user_bulk.import_users. Both use pre-hashed
+passwords so only the database path is compared. Rows are removed afterwards.
+
+    python -m benchmarks.user_bulk --rows 20000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.db.session import AsyncSessionLocal, get_async_engine
+from app.models.users import User
+from app.services.user_bulk import export_users, import_users
+
+HASH = "$2b$12$" + "a" * 53
+
+
+def _rows(prefix: str, count: int) -> list[dict]:
+    return [
+        {"email": f"{prefix}{i}@bench.example.com", "full_name": f"Bench {i}", "hashed_password": HASH}
+        for i in range(count)
+    ]
+
+
+async def _per_row(rows: list[dict]) -> float:
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        for row in rows:
+            user = User(id=uuid.uuid4(), is_active=True, is_superuser=False, **row)
+            session.add(user)
+            await session.commit()
+            await session.refresh(user)
+    return time.perf_counter() - started
+
+
+async def _cleanup(prefix: str) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(User).where(User.email.like(f"{prefix}%")))
+        await session.commit()
+
+
+async def _run(args: argparse.Namespace) -> None:
+    prefix = f"bulk-{uuid.uuid4().hex[:8]}-"
+    try:
+        per_row_rows = min(args.rows, args.per_row_rows)
+        per_row = await _per_row(_rows(prefix + "row-", per_row_rows))
+        report = await import_users(_rows(prefix + "copy-", args.rows), batch_size=args.batch_size)
+
+        stats: dict[str, int] = {}
+        started = time.perf_counter()
+        async for _ in export_users(fmt="ndjson", stats=stats, batch_size=args.batch_size):
+            pass
+        export_seconds = time.perf_counter() - started
+    finally:
+        await _cleanup(prefix)
+        await get_async_engine().dispose()
+
+    print(f"{'':<14}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+    for name, rows, seconds in (
+        ("per-row", per_row_rows, per_row),
+        ("copy import", report.rows, report.seconds),
+        ("export", stats.get("rows", 0), export_seconds),
+    ):
+        print(f"{name:<14}{rows:>10}{seconds:>10.2f}{rows / seconds:>12.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--per-row-rows", type=int, default=2_000, help="cap for the slow path")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()